@@ -6,12 +6,10 @@ from sqlalchemy import pool
 from alembic import context
 
 from core.models.base import Base
-from core.config import settings
+from core.config import get_settings
 
 # Import all models to ensure they are registered with the metadata
-from core.models.users import User
-from core.models.text import Text
-from core.models.temp_codes import TempCode
+import core.models  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -23,7 +21,7 @@ database_url = config.get_main_option("sqlalchemy.url")
 if not database_url or database_url.strip() == "" or "neon.tech" in database_url:
     # Преобразуем postgresql+asyncpg:// в postgresql:// для alembic
     # Alembic использует синхронный драйвер, поэтому нужен postgresql:// вместо postgresql+asyncpg://
-    db_url = settings.DATABASE_URL
+    db_url = get_settings().DATABASE_URL
     if "postgresql+asyncpg://" in db_url:
         db_url = db_url.replace("postgresql+asyncpg://", "postgresql://")
     config.set_main_option("sqlalchemy.url", db_url)
@@ -61,7 +59,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
-        version_table_schema="hash_clash",
+        version_table_schema="kuhni_marina",
         include_schemas=True,
     )
 
@@ -70,12 +68,12 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection):
-    # Устанавливаем search_path для схемы hash_clash
-    connection.execute(text("SET search_path TO hash_clash, public"))
+    # Устанавливаем search_path для схемы kuhni_marina
+    connection.execute(text("SET search_path TO kuhni_marina, public"))
     context.configure(
         connection=connection, 
         target_metadata=target_metadata,
-        version_table_schema="hash_clash",
+        version_table_schema="kuhni_marina",
         include_schemas=True,
     )
 
@@ -95,8 +93,8 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        # Устанавливаем search_path для схемы hash_clash
-        connection.execute(text("SET search_path TO hash_clash, public"))
+        # Устанавливаем search_path для схемы kuhni_marina
+        connection.execute(text("SET search_path TO kuhni_marina, public"))
         connection.commit()
         do_run_migrations(connection)
 
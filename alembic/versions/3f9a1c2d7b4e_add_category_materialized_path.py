@@ -0,0 +1,55 @@
+"""add_category_materialized_path
+
+Revision ID: 3f9a1c2d7b4e
+Revises: 527b8c2bcc8c
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b4e'
+down_revision: Union[str, None] = '527b8c2bcc8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('path', sa.String(collation='C'), nullable=True))
+    op.add_column('categories', sa.Column('depth', sa.Integer(), nullable=False, server_default='0'))
+
+    # Заполняем путь и глубину для существующих категорий
+    op.execute(
+        """
+        WITH RECURSIVE tree AS (
+            SELECT id, '/' || id || '/' AS path, 0 AS depth
+            FROM categories
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, t.path || c.id || '/', t.depth + 1
+            FROM categories c
+            JOIN tree t ON c.parent_id = t.id
+        )
+        UPDATE categories
+        SET path = tree.path, depth = tree.depth
+        FROM tree
+        WHERE categories.id = tree.id
+        """
+    )
+    # Категории из циклов недостижимы от корней — делаем их корневыми по пути
+    op.execute("UPDATE categories SET path = '/' || id || '/' WHERE path IS NULL")
+
+    op.alter_column('categories', 'path', existing_type=sa.String(collation='C'), nullable=False)
+    op.create_index('idx_categories_path', 'categories', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_categories_path', table_name='categories')
+    op.drop_column('categories', 'depth')
+    op.drop_column('categories', 'path')
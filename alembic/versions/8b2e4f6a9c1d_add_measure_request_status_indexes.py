@@ -0,0 +1,47 @@
+"""add_measure_request_status_indexes
+
+Revision ID: 8b2e4f6a9c1d
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f6a9c1d'
+down_revision: Union[str, None] = '3f9a1c2d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицу, но не работает внутри
+    # транзакции. Если сборка прервется, останется INVALID-индекс: его нужно удалить
+    # (DROP INDEX CONCURRENTLY) и повторить миграцию.
+    with op.get_context().autocommit_block():
+        # Списки по статусу в порядке created_at DESC, id (в т.ч. keyset-страницы)
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_measure_requests_status_created_at
+            ON measure_requests (status, created_at DESC, id)
+            """
+        )
+        # Очередь открытых заявок: маленький индекс, который не растет вместе с архивом
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_measure_requests_open_created_at
+            ON measure_requests (created_at DESC, id)
+            WHERE status IN ('NEW', 'IN_PROGRESS')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_measure_requests_open_created_at")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_measure_requests_status_created_at")
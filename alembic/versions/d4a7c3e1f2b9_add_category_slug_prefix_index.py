@@ -0,0 +1,37 @@
+"""add_category_slug_prefix_index
+
+Revision ID: d4a7c3e1f2b9
+Revises: 8b2e4f6a9c1d
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c3e1f2b9'
+down_revision: Union[str, None] = '8b2e4f6a9c1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Уникальный индекс по slug построен в сортировке базы и не годится для поиска
+    # по префиксу. Индекс по (slug COLLATE "C") обслуживает диапазон
+    # [prefix, prefix || U+10FFFF) из core.utils.slug.slug_prefix_filter.
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_categories_slug_c
+            ON categories ((slug COLLATE "C"))
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_categories_slug_c")
@@ -2,7 +2,7 @@ from typing import AsyncGenerator
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.session import get_async_session
+from db.session import get_async_session, get_read_session
 from repositories.attributes import AttributeRepository
 from repositories.categories import CategoryRepository
 from repositories.banners import BannerRepository
@@ -13,6 +13,11 @@ from services.categories import CategoryService
 from services.banners import BannerService
 from services.measure_requests import MeasureRequestService
 
+# get_async_session кэшируется FastAPI в рамках одного запроса, поэтому все
+# репозитории ниже получают одну и ту же сессию и разделяют её identity map
+# (см. db.entity_loader.EntityLoader): повторные get_*_by_id не ходят в БД.
+# Зависимости *_read_* используют get_read_session (реплики) и подключаются в GET-маршрутах.
+
 async def get_attribute_repository(
     db: AsyncSession = Depends(get_async_session),
 ) -> AttributeRepository:
@@ -25,6 +30,18 @@ async def get_attribute_service(
     return AttributeService(attribute_repository)
 
 
+async def get_attribute_read_repository(
+    db: AsyncSession = Depends(get_read_session),
+) -> AttributeRepository:
+    return AttributeRepository(db)
+
+
+async def get_attribute_read_service(
+    attribute_repository: AttributeRepository = Depends(get_attribute_read_repository),
+) -> AttributeService:
+    return AttributeService(attribute_repository)
+
+
 async def get_category_repository(
     db: AsyncSession = Depends(get_async_session),
 ) -> CategoryRepository:
@@ -37,6 +54,18 @@ async def get_category_service(
     return CategoryService(category_repository)
 
 
+async def get_category_read_repository(
+    db: AsyncSession = Depends(get_read_session),
+) -> CategoryRepository:
+    return CategoryRepository(db)
+
+
+async def get_category_read_service(
+    category_repository: CategoryRepository = Depends(get_category_read_repository),
+) -> CategoryService:
+    return CategoryService(category_repository)
+
+
 async def get_banner_repository(
     db: AsyncSession = Depends(get_async_session),
 ) -> BannerRepository:
@@ -49,6 +78,18 @@ async def get_banner_service(
     return BannerService(banner_repository)
 
 
+async def get_banner_read_repository(
+    db: AsyncSession = Depends(get_read_session),
+) -> BannerRepository:
+    return BannerRepository(db)
+
+
+async def get_banner_read_service(
+    banner_repository: BannerRepository = Depends(get_banner_read_repository),
+) -> BannerService:
+    return BannerService(banner_repository)
+
+
 async def get_measure_request_repository(
     db: AsyncSession = Depends(get_async_session),
 ) -> MeasureRequestRepository:
@@ -59,3 +100,15 @@ async def get_measure_request_service(
     measure_request_repository: MeasureRequestRepository = Depends(get_measure_request_repository),
 ) -> MeasureRequestService:
     return MeasureRequestService(measure_request_repository)
+
+
+async def get_measure_request_read_repository(
+    db: AsyncSession = Depends(get_read_session),
+) -> MeasureRequestRepository:
+    return MeasureRequestRepository(db)
+
+
+async def get_measure_request_read_service(
+    measure_request_repository: MeasureRequestRepository = Depends(get_measure_request_read_repository),
+) -> MeasureRequestService:
+    return MeasureRequestService(measure_request_repository)
@@ -0,0 +1,59 @@
+from contextlib import asynccontextmanager
+import logging
+import time
+
+from fastapi import FastAPI
+
+from core.config import get_settings
+from core.models.categories import CategoryType
+from core.models.db_helper import get_db_helper
+from repositories.banners import BannerRepository
+from repositories.categories import CategoryRepository
+from services.banners import BannerService
+from services.categories import CategoryService
+
+logger = logging.getLogger(__name__)
+
+
+async def preload_read_models() -> None:
+    """
+    Заполняет кэш дерева категорий и прогоняет запрос активных баннеров.
+
+    У баннеров нет кэша в процессе: запрос только прогревает кэши PostgreSQL
+    и подготовленные выражения соединения.
+    """
+    started = time.perf_counter()
+    async with get_db_helper().get_read_session_factory()() as session:
+        category_service = CategoryService(CategoryRepository(session))
+        await category_service.get_all_categories_entry()
+        for category_type in CategoryType:
+            await category_service.get_categories_by_type_entry(category_type)
+        await BannerService(BannerRepository(session)).get_all_banners()
+    logger.info("Read models preloaded in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Старт: прогрев пула и кэшей, после чего приложение готово принимать запросы.
+    Остановка: закрытие соединений всех движков.
+
+    Ошибки прогрева не останавливают запуск — соединения и кэши тогда
+    создаются лениво на первых запросах, как без прогрева.
+    """
+    app.state.ready = False
+    # Настройки и движки создаются здесь, а не при импорте приложения
+    db_helper = get_db_helper()
+    try:
+        await db_helper.warm_up()
+        if get_settings().PRELOAD_READ_MODELS:
+            await preload_read_models()
+    except Exception as e:
+        logger.error(f"Startup warm-up failed: {str(e)}")
+    app.state.ready = True
+
+    yield
+
+    app.state.ready = False
+    await db_helper.dispose()
+    logger.info("Database engines disposed")
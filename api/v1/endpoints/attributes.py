@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 
-from api.deps import get_attribute_service
+from api.deps import get_attribute_service, get_attribute_read_service
 from services.attributes import AttributeService
+from core.utils.responses import ORJSONModelResponse
+from core.utils.single_flight import coalesce
 from core.schemas.attributes import (
     AttributeCreateRequest,
     AttributeUpdateRequest,
@@ -20,17 +22,19 @@ router = APIRouter(
 @router.get(
     "",
     response_model=AttributeListResponse,
+    response_class=ORJSONModelResponse,
     summary="Получить все атрибуты",
     description="Возвращает список всех атрибутов",
 )
 async def get_attributes(
-    attribute_service: AttributeService = Depends(get_attribute_service),
+    request: Request,
+    attribute_service: AttributeService = Depends(get_attribute_read_service),
 ):
     """
     Получить список всех атрибутов:
     - Возвращает все существующие атрибуты
     """
-    return await attribute_service.get_all_attributes()
+    return ORJSONModelResponse(await coalesce(request, attribute_service.get_all_attributes))
 
 
 @router.get(
@@ -45,7 +49,7 @@ async def get_attributes(
 )
 async def get_attribute_by_id(
     attribute_id: int,
-    attribute_service: AttributeService = Depends(get_attribute_service),
+    attribute_service: AttributeService = Depends(get_attribute_read_service),
 ):
     """
     Получить атрибут по идентификатору:
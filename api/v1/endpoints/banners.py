@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 
-from api.deps import get_banner_service
+from api.deps import get_banner_service, get_banner_read_service
 from services.banners import BannerService
+from core.utils.responses import ORJSONModelResponse
+from core.utils.single_flight import coalesce
 from core.schemas.banners import (
     BannerCreateRequest,
     BannerUpdateRequest,
@@ -20,18 +22,21 @@ router = APIRouter(
 @router.get(
     "",
     response_model=BannerListResponse,
+    response_class=ORJSONModelResponse,
     summary="Получить все активные баннеры",
     description="Возвращает список всех активных баннеров",
 )
 async def get_banners(
-    banner_service: BannerService = Depends(get_banner_service),
+    request: Request,
+    banner_service: BannerService = Depends(get_banner_read_service),
 ):
     """
     Получить список всех активных баннеров:
     - Возвращает только активные баннеры
     - Отсортированы по позиции и id
+    - Одинаковые параллельные запросы выполняются одним обращением к БД
     """
-    return await banner_service.get_all_banners()
+    return ORJSONModelResponse(await coalesce(request, banner_service.get_all_banners))
 
 
 @router.get(
@@ -46,7 +51,7 @@ async def get_banners(
 )
 async def get_banner_by_id(
     banner_id: int,
-    banner_service: BannerService = Depends(get_banner_service),
+    banner_service: BannerService = Depends(get_banner_read_service),
 ):
     """
     Получить баннер по идентификатору:
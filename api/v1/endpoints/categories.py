@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, status
+from typing import Optional
 
-from api.deps import get_category_service
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+
+from api.deps import get_category_service, get_category_read_service
+from core.cache.categories import CategoryTreeEntry
 from core.models.categories import CategoryType
 from core.schemas.categories import (
     CategoryCreateRequest,
     CategoryUpdateRequest,
+    CategoryMoveRequest,
     CategoryResponse,
+    CategoryTreeNode,
     CategoryListResponse,
+    CategoryAncestorsResponse,
+    CategoryBulkImportRequest,
+    CategoryBulkImportResponse,
     CategoryDeleteResponse,
 )
+from core.utils.compression import choose_encoding
+from core.utils.http import etag_matches
+from core.utils.responses import ORJSONModelResponse
+from core.utils.single_flight import coalesce
 from services.categories import CategoryService
 
 router = APIRouter(
@@ -18,19 +30,43 @@ router = APIRouter(
 )
 
 
+def _tree_response(
+    entry: CategoryTreeEntry,
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+) -> Response:
+    """
+    Отдает закэшированное (и заранее сжатое) JSON-тело дерева или 304, если ETag совпал.
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body, encoding = entry.encoded_body(choose_encoding(accept_encoding))
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get(
     "",
     response_model=CategoryListResponse,
     summary="Получить все категории",
     description="Возвращает древовидный список всех активных категорий",
+    responses={304: {"description": "Дерево не изменилось (If-None-Match)"}},
 )
 async def get_categories(
-    category_service: CategoryService = Depends(get_category_service),
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    category_service: CategoryService = Depends(get_category_read_service),
 ):
     """
     Получить все активные категории в виде дерева.
+    - Поддерживает ETag / If-None-Match
     """
-    return await category_service.get_all_categories()
+    # При пустом кэше одинаковые параллельные запросы строят дерево один раз
+    entry = await coalesce(request, category_service.get_all_categories_entry)
+    return _tree_response(entry, if_none_match, accept_encoding)
 
 
 @router.get(
@@ -38,15 +74,41 @@ async def get_categories(
     response_model=CategoryListResponse,
     summary="Получить категории по типу",
     description="Возвращает древовидный список активных категорий указанного типа",
+    responses={304: {"description": "Дерево не изменилось (If-None-Match)"}},
 )
 async def get_categories_by_type(
     category_type: CategoryType,
-    category_service: CategoryService = Depends(get_category_service),
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    category_service: CategoryService = Depends(get_category_read_service),
 ):
     """
     Получить активные категории по типу в виде дерева.
+    - Поддерживает ETag / If-None-Match
     """
-    return await category_service.get_categories_by_type(category_type)
+    entry = await coalesce(request, lambda: category_service.get_categories_by_type_entry(category_type))
+    return _tree_response(entry, if_none_match, accept_encoding)
+
+
+@router.get(
+    "/slug/{slug}",
+    response_model=CategoryResponse,
+    summary="Получить категорию по slug",
+    description="Возвращает активную категорию по URL-идентификатору",
+    responses={
+        200: {"description": "Категория найдена"},
+        404: {"description": "Категория не найдена"},
+    },
+)
+async def get_category_by_slug(
+    slug: str,
+    category_service: CategoryService = Depends(get_category_read_service),
+):
+    """
+    Получить активную категорию по slug (для маршрутов витрины вида /catalog/kuhni-uglovye).
+    """
+    return await category_service.get_category_by_slug(slug)
 
 
 @router.get(
@@ -61,7 +123,7 @@ async def get_categories_by_type(
 )
 async def get_category_by_id(
     category_id: int,
-    category_service: CategoryService = Depends(get_category_service),
+    category_service: CategoryService = Depends(get_category_read_service),
 ):
     """
     Получить активную категорию по идентификатору.
@@ -69,6 +131,51 @@ async def get_category_by_id(
     return await category_service.get_category_by_id(category_id)
 
 
+@router.get(
+    "/{category_id}/subtree",
+    response_model=CategoryTreeNode,
+    response_class=ORJSONModelResponse,
+    summary="Получить поддерево категории",
+    description="Возвращает активную категорию с дочерними категориями не глубже depth уровней",
+    responses={
+        200: {"description": "Поддерево найдено"},
+        404: {"description": "Категория не найдена"},
+    },
+)
+async def get_category_subtree(
+    category_id: int,
+    depth: Optional[int] = Query(None, ge=0, description="Максимальная глубина относительно категории"),
+    category_service: CategoryService = Depends(get_category_read_service),
+):
+    """
+    Получить поддерево категории:
+    - Без depth возвращаются все потомки
+    - depth=1 возвращает категорию и её непосредственные дочерние категории
+    """
+    return ORJSONModelResponse(await category_service.get_category_subtree(category_id, depth))
+
+
+@router.get(
+    "/{category_id}/ancestors",
+    response_model=CategoryAncestorsResponse,
+    response_class=ORJSONModelResponse,
+    summary="Получить путь категории",
+    description="Возвращает цепочку активных категорий от корня до указанной включительно (хлебные крошки)",
+    responses={
+        200: {"description": "Путь найден"},
+        404: {"description": "Категория не найдена"},
+    },
+)
+async def get_category_ancestors(
+    category_id: int,
+    category_service: CategoryService = Depends(get_category_read_service),
+):
+    """
+    Получить путь категории от корня для хлебных крошек.
+    """
+    return ORJSONModelResponse(await category_service.get_category_ancestors(category_id))
+
+
 @router.post(
     "",
     response_model=CategoryResponse,
@@ -91,6 +198,31 @@ async def create_category(
     return await category_service.create_category(request)
 
 
+@router.post(
+    "/bulk",
+    response_model=CategoryBulkImportResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Массовый импорт категорий",
+    description="Создает пачку категорий в одной транзакции. Родители задаются ключом из пачки или id существующей категории",
+    responses={
+        201: {"description": "Категории созданы"},
+        400: {"description": "Некорректные ключи или ссылки на родителей"},
+        404: {"description": "Родительская категория не найдена"},
+    },
+)
+async def import_categories(
+    request: CategoryBulkImportRequest,
+    category_service: CategoryService = Depends(get_category_service),
+):
+    """
+    Массовый импорт категорий:
+    - parent_key ссылается на key другой категории из этой же пачки
+    - parent_id ссылается на уже существующую активную категорию
+    - slug генерируются пачкой, вставка выполняется одним INSERT
+    """
+    return await category_service.import_categories(request)
+
+
 @router.put(
     "/{category_id}",
     response_model=CategoryResponse,
@@ -116,6 +248,30 @@ async def update_category(
     return await category_service.update_category(category_id, request)
 
 
+@router.patch(
+    "/{category_id}/parent",
+    response_model=CategoryResponse,
+    summary="Переместить категорию",
+    description="Переносит категорию вместе с поддеревом под другого родителя или в корень",
+    responses={
+        200: {"description": "Категория перемещена"},
+        400: {"description": "Перемещение создало бы цикл"},
+        404: {"description": "Категория или родительская категория не найдена"},
+    },
+)
+async def move_category(
+    category_id: int,
+    request: CategoryMoveRequest,
+    category_service: CategoryService = Depends(get_category_service),
+):
+    """
+    Переместить категорию:
+    - parent_id=null делает категорию корневой
+    - Нельзя переместить категорию внутрь её собственного поддерева
+    """
+    return await category_service.move_category(category_id, request)
+
+
 @router.delete(
     "/{category_id}",
     response_model=CategoryDeleteResponse,
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, Query, status
+from datetime import date
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
-from api.deps import get_measure_request_service
+from api.deps import get_measure_request_service, get_measure_request_read_service
+from core.models.db_helper import get_db_helper
+from repositories.measure_requests import MeasureRequestRepository
 from services.measure_requests import MeasureRequestService
+from core.utils.responses import ORJSONModelResponse
+from core.utils.single_flight import coalesce
 from core.models.measure_requests import MeasureRequestStatus
 from core.schemas.measure_requests import (
     MeasureRequestCreateRequest,
     MeasureRequestUpdateRequest,
     MeasureRequestStatusUpdateRequest,
+    MeasureRequestBulkStatusRequest,
+    MeasureRequestBulkStatusResponse,
+    MeasureRequestExportFormat,
     MeasureRequestResponse,
     MeasureRequestListResponse,
 )
@@ -22,20 +31,80 @@ router = APIRouter(
 @router.get(
     "",
     response_model=MeasureRequestListResponse,
-    summary="Получить все замеры",
-    description="Возвращает список всех замеров с возможностью фильтрации по статусу",
+    response_class=ORJSONModelResponse,
+    summary="Получить замеры",
+    description="Возвращает страницу замеров с возможностью фильтрации по статусу",
+    responses={400: {"description": "Некорректный курсор"}},
 )
 async def get_measure_requests(
+    request: Request,
     status: Optional[MeasureRequestStatus] = Query(None, description="Фильтр по статусу"),
-    measure_request_service: MeasureRequestService = Depends(get_measure_request_service),
+    limit: Optional[int] = Query(None, ge=1, description="Размер страницы (ограничен сверху настройками)"),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущего ответа"),
+    with_total: bool = Query(False, description="Добавить оценку общего числа замеров"),
+    measure_request_service: MeasureRequestService = Depends(get_measure_request_read_service),
 ):
     """
-    Получить список всех замеров:
-    - Возвращает все существующие замеры
+    Получить страницу замеров:
     - Опциональная фильтрация по статусу через query параметр
     - Отсортированы по дате создания (новые сначала)
+    - Следующая страница запрашивается с cursor=next_cursor; next_cursor=null на последней странице
+    - with_total=true добавляет приблизительное общее число (total_estimate)
     """
-    return await measure_request_service.get_all_measure_requests(status)
+    response = await coalesce(
+        request,
+        lambda: measure_request_service.get_all_measure_requests(status, limit, cursor, with_total),
+    )
+    return ORJSONModelResponse(response)
+
+
+EXPORT_MEDIA_TYPES = {
+    MeasureRequestExportFormat.CSV: "text/csv; charset=utf-8",
+    MeasureRequestExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+@router.get(
+    "/export",
+    summary="Выгрузить замеры",
+    description="Потоковая выгрузка замеров в CSV или NDJSON за период",
+    response_class=StreamingResponse,
+    responses={
+        200: {"description": "Файл выгрузки", "content": {"text/csv": {}, "application/x-ndjson": {}}},
+        400: {"description": "Некорректный период"},
+    },
+)
+async def export_measure_requests(
+    export_format: MeasureRequestExportFormat = Query(
+        MeasureRequestExportFormat.CSV, alias="format", description="Формат: csv или ndjson"
+    ),
+    date_from: Optional[date] = Query(None, alias="from", description="Начало периода (включительно)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Конец периода (включительно)"),
+    status: Optional[MeasureRequestStatus] = Query(None, description="Фильтр по статусу"),
+    measure_request_service: MeasureRequestService = Depends(get_measure_request_read_service),
+):
+    """
+    Выгрузить замеры для таблиц:
+    - Строки читаются из серверного курсора пачками и сразу отправляются клиенту
+    - Память не растет с объемом выгрузки
+    - Отсортированы по дате создания (старые сначала)
+    """
+    measure_request_service.validate_export_period(date_from, date_to)
+
+    async def stream():
+        # Сессия из зависимостей закрывается раньше, чем StreamingResponse дочитает поток,
+        # поэтому поток держит собственную сессию до последней строки
+        async with get_db_helper().get_read_session_factory()() as session:
+            export_service = MeasureRequestService(MeasureRequestRepository(session))
+            async for chunk in export_service.export_measure_requests(export_format, status, date_from, date_to):
+                yield chunk
+
+    filename = f"measure-requests.{export_format.value}"
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get(
@@ -50,7 +119,7 @@ async def get_measure_requests(
 )
 async def get_measure_request_by_id(
     measure_request_id: int,
-    measure_request_service: MeasureRequestService = Depends(get_measure_request_service),
+    measure_request_service: MeasureRequestService = Depends(get_measure_request_read_service),
 ):
     """
     Получить замер по идентификатору:
@@ -93,6 +162,7 @@ async def create_measure_request(
         200: {"description": "Замер успешно обновлен"},
         400: {"description": "Некорректные данные для замера"},
         404: {"description": "Замер не найден"},
+        409: {"description": "Переход в указанный статус запрещен"},
     },
 )
 async def update_measure_request(
@@ -116,6 +186,7 @@ async def update_measure_request(
     responses={
         200: {"description": "Статус замера успешно обновлен"},
         404: {"description": "Замер не найден"},
+        409: {"description": "Переход в указанный статус запрещен"},
     },
 )
 async def update_measure_request_status(
@@ -127,6 +198,28 @@ async def update_measure_request_status(
     Обновить статус замера:
     - Обновляет только статус замера
     - Доступные статусы: NEW, IN_PROGRESS, DONE, CANCELLED
+    - Выполненный замер (DONE) закрыт; отмененный (CANCELLED) можно вернуть только в NEW
     """
     return await measure_request_service.update_measure_request_status(measure_request_id, request)
 
+
+@router.post(
+    "/bulk-status",
+    response_model=MeasureRequestBulkStatusResponse,
+    summary="Обновить статус нескольких замеров",
+    description="Переводит замеры из списка в указанный статус одним запросом к БД",
+    responses={
+        200: {"description": "Результат по каждому идентификатору"},
+    },
+)
+async def bulk_update_measure_request_status(
+    request: MeasureRequestBulkStatusRequest,
+    measure_request_service: MeasureRequestService = Depends(get_measure_request_service),
+):
+    """
+    Массовое обновление статуса (например, закрытие заявок в конце смены):
+    - updated — замеры, переведенные в статус
+    - skipped — замеры, для которых переход запрещен (например, DONE -> NEW)
+    - missing — несуществующие идентификаторы
+    """
+    return await measure_request_service.bulk_update_status(request)
@@ -0,0 +1,152 @@
+"""
+Бенчмарк загрузки дерева категорий: ORM + selectinload против плоской проекции колонок.
+
+Данные создаются во временной схеме базы из DATABASE_URL и удаляются после прогона.
+
+Запуск:
+    python -m benchmarks.category_tree --size 5000 --repeat 20
+"""
+from typing import List
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from core.config import get_settings
+from core.models.categories import Category, CategoryType
+from core.schemas.categories import CategoryTreeNode
+from repositories.categories import CategoryRepository
+from services.categories import CategoryService
+
+BENCH_SCHEMA = "bench_category_tree"
+ROOTS = 10
+FANOUT = 5
+
+
+def legacy_build_tree(categories: List[Category]) -> List[CategoryTreeNode]:
+    """
+    Прежний вариант _build_tree по ORM-объектам.
+    """
+    nodes: dict[int, CategoryTreeNode] = {}
+    roots: List[CategoryTreeNode] = []
+    for category in categories:
+        nodes[category.id] = CategoryTreeNode(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            parent_id=category.parent_id,
+            type=category.type,
+            is_active=category.is_active,
+            message=None,
+            children=[],
+        )
+    for category in categories:
+        node = nodes[category.id]
+        if category.parent_id and category.parent_id in nodes:
+            nodes[category.parent_id].children.append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+async def load_orm(session) -> List[CategoryTreeNode]:
+    query = (
+        select(Category)
+        .options(selectinload(Category.children))
+        .where(Category.is_active.is_(True))
+        .order_by(Category.parent_id, Category.id)
+    )
+    result = await session.execute(query)
+    return legacy_build_tree(result.scalars().unique().all())
+
+
+async def load_projection(session) -> List[CategoryTreeNode]:
+    rows = await CategoryRepository(session).get_all_categories()
+    return CategoryService(None)._build_tree(rows)
+
+
+def make_rows(size: int) -> List[dict]:
+    rows = []
+    paths: dict[int, tuple[str, int]] = {}
+    for category_id in range(1, size + 1):
+        parent_id = None if category_id <= ROOTS else (category_id - ROOTS - 1) // FANOUT + 1
+        parent_path, parent_depth = paths[parent_id] if parent_id else ("/", -1)
+        path, depth = f"{parent_path}{category_id}/", parent_depth + 1
+        paths[category_id] = (path, depth)
+        rows.append({
+            "id": category_id,
+            "name": f"Категория {category_id}",
+            "slug": f"category-{category_id}",
+            "parent_id": parent_id,
+            "type": CategoryType.KITCHEN if category_id % 2 else CategoryType.FURNITURE,
+            "is_active": True,
+            "path": path,
+            "depth": depth,
+        })
+    return rows
+
+
+async def measure(name: str, loader, session_factory, counter: dict, repeat: int) -> None:
+    timings = []
+    peaks = []
+    queries = 0
+    roots = []
+    for _ in range(repeat):
+        async with session_factory() as session:
+            counter["queries"] = 0
+            tracemalloc.start()
+            started = time.perf_counter()
+            roots = await loader(session)
+            timings.append((time.perf_counter() - started) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+            queries = counter["queries"]
+    print(
+        f"{name:<12} roots={len(roots):<4} queries/call={queries} "
+        f"mean={statistics.mean(timings):8.2f} ms  median={statistics.median(timings):8.2f} ms  "
+        f"peak alloc={statistics.median(peaks):9.0f} KiB"
+    )
+
+
+async def main(size: int, repeat: int) -> None:
+    engine = create_async_engine(
+        get_settings().DATABASE_URL,
+        connect_args={"server_settings": {"search_path": BENCH_SCHEMA}},
+    )
+    counter = {"queries": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_queries(*args):
+        counter["queries"] += 1
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+        await conn.execute(text("CREATE TYPE category_type AS ENUM ('KITCHEN', 'FURNITURE')"))
+        await conn.run_sync(lambda sync_conn: Category.__table__.create(sync_conn))
+        await conn.execute(insert(Category.__table__), make_rows(size))
+
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        print(f"Category tree: {size} categories, {repeat} runs")
+        # Прогрев соединения и кэшей планировщика
+        await measure("warmup", load_projection, session_factory, counter, 1)
+        await measure("orm", load_orm, session_factory, counter, repeat)
+        await measure("projection", load_projection, session_factory, counter, repeat)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.repeat))
@@ -0,0 +1,109 @@
+"""
+Проверка, что запрос списка замеров по статусу идет по индексам из миграции
+8b2e4f6a9c1d (idx_measure_requests_status_created_at / idx_measure_requests_open_created_at).
+
+Скрипт выполняет настоящий запрос MeasureRequestRepository.get_all_measure_requests,
+перехватывает его SQL и параметры и строит для них EXPLAIN. На маленькой таблице
+планировщик честно выбирает Seq Scan, поэтому по умолчанию он отключается
+(enable_seqscan = off): так проверяется, что индекс вообще применим к запросу.
+Для следующей страницы курсор должен быть границей скана: created_at входит
+в Index Cond ожидаемого индекса, а не только в Filter над ним.
+Код выхода 1, если хотя бы один вариант запроса не использует ожидаемый индекс.
+
+Запуск:
+    python -m benchmarks.explain_measure_requests [--allow-seqscan]
+"""
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import sys
+
+from sqlalchemy import event, text
+
+from core.models.db_helper import get_db_helper
+from core.models.measure_requests import MeasureRequest, MeasureRequestStatus
+from repositories.measure_requests import MeasureRequestRepository
+
+STATUS_INDEX = "idx_measure_requests_status_created_at"
+OPEN_INDEX = "idx_measure_requests_open_created_at"
+PAGE_SIZE = 51
+
+
+def plan_indexes(node: dict) -> Iterator[Tuple[str, str]]:
+    """
+    (имя индекса, Index Cond) для каждого узла плана, который читает индекс.
+    """
+    if "Index Name" in node:
+        yield node["Index Name"], node.get("Index Cond", "")
+    for child in node.get("Plans", []):
+        yield from plan_indexes(child)
+
+
+async def explain_case(
+    status: MeasureRequestStatus,
+    after: Optional[Tuple],
+    allow_seqscan: bool,
+) -> List[Tuple[str, str]]:
+    db_helper = get_db_helper()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(db_helper.engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with db_helper.session_factory() as session:
+            await MeasureRequestRepository(session).get_all_measure_requests(status, PAGE_SIZE, after)
+            statement, parameters = captured[-1]
+            if not allow_seqscan:
+                await session.execute(text("SET LOCAL enable_seqscan = off"))
+            connection = await session.connection()
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar_one()
+            await session.rollback()
+    finally:
+        event.remove(db_helper.engine.sync_engine, "before_cursor_execute", capture)
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(plan_indexes(plan[0]["Plan"]))
+
+
+async def main(allow_seqscan: bool) -> int:
+    db_helper = get_db_helper()
+    failures = 0
+    try:
+        async with db_helper.session_factory() as session:
+            row = (await session.execute(
+                MeasureRequest.__table__.select().order_by(MeasureRequest.created_at.desc()).limit(1)
+            )).first()
+        # Курсор с реальной строкой, если таблица не пуста
+        after = (row.created_at, row.id) if row is not None else None
+
+        for status in MeasureRequestStatus:
+            expected = {STATUS_INDEX, OPEN_INDEX} if status in (
+                MeasureRequestStatus.NEW, MeasureRequestStatus.IN_PROGRESS
+            ) else {STATUS_INDEX}
+            for label, cursor in (("first page", None), ("next page", after)):
+                if label == "next page" and cursor is None:
+                    continue
+                used = await explain_case(status, cursor, allow_seqscan)
+                matched = [(name, cond) for name, cond in used if name in expected]
+                ok = bool(matched)
+                if cursor is not None:
+                    # Курсор в Filter означает линейный скан от самой новой строки
+                    ok = any("created_at" in cond for _, cond in matched)
+                failures += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} status={status.value:<12} {label:<10} indexes={used or '-'}")
+    finally:
+        await db_helper.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--allow-seqscan", action="store_true", help="не отключать Seq Scan (план как в проде)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.allow_seqscan)))
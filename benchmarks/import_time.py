@@ -0,0 +1,65 @@
+"""
+Время холодного импорта приложения по `python -X importtime`.
+
+Каждый прогон — отдельный процесс без кэша модулей. Печатает медиану общего
+времени импорта и самые дорогие модули последнего прогона (по cumulative).
+Импорт main:app не читает .env и не создает движок, поэтому скрипт
+работает без настроек БД.
+
+Запуск:
+    python -m benchmarks.import_time --module main --repeat 5 --top 15
+"""
+from typing import List, Tuple
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> List[Tuple[int, int, str]]:
+    """
+    Строки importtime одного прогона: (self мкс, cumulative мкс, модуль).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # После "|" идет один пробел, дальше отступ по глубине вложенности
+        rows.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    return rows
+
+
+def main(module: str, repeat: int, top: int) -> None:
+    totals = []
+    rows = []
+    for _ in range(repeat):
+        rows = measure(module)
+        # Строка самого модуля без отступа содержит полное (cumulative) время его импорта
+        totals.append(next(cumulative for _, cumulative, name in rows if name == module) / 1000)
+
+    print(f"import {module}: {repeat} runs, median={statistics.median(totals):.1f} ms  "
+          f"min={min(totals):.1f} ms  max={max(totals):.1f} ms")
+    print(f"\nTop {top} modules by cumulative time (last run):")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  self={self_us / 1000:7.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.module, args.repeat, args.top)
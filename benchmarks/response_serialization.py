@@ -0,0 +1,167 @@
+"""
+Стоимость одного элемента списка на пути "строки БД -> JSON-байты".
+
+legacy   — модели собираются с валидацией, затем FastAPI валидирует их повторно
+           по response_model (serialize_response) и кодирует через JSONResponse;
+fast     — model_construct в сервисе и ORJSONModelResponse без повторной валидации.
+
+База не нужна: строки имитируются объектами с атрибутами как у ORM.
+
+Запуск:
+    python -m benchmarks.response_serialization --items 1000 --repeat 20
+"""
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, List
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from core.models.categories import CategoryType
+from core.models.measure_requests import MeasureRequestStatus
+from core.schemas.categories import CategoryListResponse, CategoryTreeNode
+from core.schemas.measure_requests import MeasureRequestListResponse, MeasureRequestResponse
+from core.utils.responses import ORJSONModelResponse
+from services.categories import CategoryService
+
+ROOTS = 10
+FANOUT = 5
+
+
+def make_measure_rows(count: int) -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=index,
+            full_name=f"Иван Иванов {index}",
+            phone="+79990000000",
+            address=f"г. Москва, ул. Ленина, д. {index}",
+            preferred_date=date(2025, 1, 1),
+            comment="Позвонить за час",
+            status=MeasureRequestStatus.NEW,
+            created_at=datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc),
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def make_category_rows(count: int) -> List[tuple]:
+    return [
+        (
+            index,
+            f"Категория {index}",
+            f"category-{index}",
+            None if index <= ROOTS else (index - ROOTS - 1) // FANOUT + 1,
+            CategoryType.KITCHEN,
+            True,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def legacy_measure_list(rows) -> MeasureRequestListResponse:
+    items = [
+        MeasureRequestResponse(
+            id=mr.id,
+            full_name=mr.full_name,
+            phone=mr.phone,
+            address=mr.address,
+            preferred_date=mr.preferred_date,
+            comment=mr.comment,
+            status=mr.status,
+            created_at=mr.created_at,
+            message=None,
+        )
+        for mr in rows
+    ]
+    return MeasureRequestListResponse(items=items, message="Список замеров успешно получен")
+
+
+def fast_measure_list(rows) -> MeasureRequestListResponse:
+    items = [
+        MeasureRequestResponse.model_construct(
+            id=mr.id,
+            full_name=mr.full_name,
+            phone=mr.phone,
+            address=mr.address,
+            preferred_date=mr.preferred_date,
+            comment=mr.comment,
+            status=mr.status,
+            created_at=mr.created_at,
+            message=None,
+        )
+        for mr in rows
+    ]
+    return MeasureRequestListResponse.model_construct(items=items, message="Список замеров успешно получен")
+
+
+def legacy_category_list(rows) -> CategoryListResponse:
+    nodes = {}
+    roots = []
+    for category_id, name, slug, parent_id, category_type, is_active in rows:
+        nodes[category_id] = CategoryTreeNode(
+            id=category_id, name=name, slug=slug, parent_id=parent_id,
+            type=category_type, is_active=is_active, message=None, children=[],
+        )
+    for node in nodes.values():
+        if node.parent_id and node.parent_id in nodes:
+            nodes[node.parent_id].children.append(node)
+        else:
+            roots.append(node)
+    return CategoryListResponse(items=roots, message="Список категорий успешно получен")
+
+
+def fast_category_list(rows) -> CategoryListResponse:
+    tree = CategoryService(None)._build_tree(rows)
+    return CategoryListResponse.model_construct(items=tree, message="Список категорий успешно получен")
+
+
+def legacy_render(response_model) -> Callable:
+    field = create_response_field(name="Response", type_=response_model)
+
+    async def render(content) -> bytes:
+        # То же, что делает FastAPI для эндпоинта, который вернул модель
+        payload = await serialize_response(field=field, response_content=content, is_coroutine=True)
+        return JSONResponse(payload).body
+
+    return render
+
+
+async def fast_render(content) -> bytes:
+    return ORJSONModelResponse(content).body
+
+
+async def measure(name: str, build, render, rows, repeat: int) -> None:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await render(build(rows))
+        timings.append(time.perf_counter() - started)
+    per_item = statistics.median(timings) / len(rows) * 1_000_000
+    print(f"{name:<28} per item={per_item:6.2f} us  total={statistics.median(timings) * 1000:7.2f} ms  "
+          f"body={len(body) / 1024:7.1f} KiB")
+
+
+async def main(items: int, repeat: int) -> None:
+    measure_rows = make_measure_rows(items)
+    category_rows = make_category_rows(items)
+    print(f"{items} items, median of {repeat} runs")
+    await measure("measure-requests legacy", legacy_measure_list, legacy_render(MeasureRequestListResponse),
+                  measure_rows, repeat)
+    await measure("measure-requests fast", fast_measure_list, fast_render, measure_rows, repeat)
+    await measure("categories legacy", legacy_category_list, legacy_render(CategoryListResponse),
+                  category_rows, repeat)
+    await measure("categories fast", fast_category_list, fast_render, category_rows, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.repeat))
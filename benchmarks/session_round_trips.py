@@ -0,0 +1,75 @@
+"""
+Счетчик обращений к БД на один запрос GET /banners: прежнее получение сессии
+(SET search_path в get_async_session, SET search_path + SELECT 1 в session_dependency)
+против текущего, где схема задается один раз на физическое соединение.
+
+Использует DATABASE_URL из настроек и только читает таблицу banners.
+
+Запуск:
+    python -m benchmarks.session_round_trips --requests 200
+"""
+from typing import AsyncGenerator
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models.db_helper import get_db_helper
+from db.session import get_async_session
+from repositories.banners import BannerRepository
+
+
+async def legacy_get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with get_db_helper().session_factory() as session:
+        await session.execute(text("SET search_path TO kuhni_marina, public"))
+        yield session
+
+
+async def legacy_session_dependency() -> AsyncGenerator[AsyncSession, None]:
+    async with get_db_helper().session_factory() as session:
+        await session.execute(text("SET search_path TO kuhni_marina, public"))
+        await session.execute(text("SELECT 1"))
+        yield session
+
+
+async def run(name: str, dependency, requests: int, counter: dict) -> None:
+    timings = []
+    counter["statements"] = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        sessions = dependency()
+        session = await sessions.__anext__()
+        await BannerRepository(session).get_all_active_banners()
+        await sessions.aclose()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(
+        f"{name:<28} statements/request={counter['statements'] / requests:4.1f}  "
+        f"mean={statistics.mean(timings):7.2f} ms  median={statistics.median(timings):7.2f} ms"
+    )
+
+
+async def main(requests: int) -> None:
+    counter = {"statements": 0}
+
+    @event.listens_for(get_db_helper().engine.sync_engine, "before_cursor_execute")
+    def count_statements(*args):
+        counter["statements"] += 1
+
+    try:
+        # Прогрев пула, чтобы открытие соединений не попало в замер
+        await run("warmup", get_async_session, 5, counter)
+        await run("legacy get_async_session", legacy_get_async_session, requests, counter)
+        await run("legacy session_dependency", legacy_session_dependency, requests, counter)
+        await run("get_async_session", get_async_session, requests, counter)
+    finally:
+        await get_db_helper().engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
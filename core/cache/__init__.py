@@ -0,0 +1,13 @@
+__all__ = (
+    "ALL_CATEGORIES_KEY",
+    "CategoryTreeCache",
+    "CategoryTreeEntry",
+    "category_tree_cache",
+)
+
+from .categories import (
+    ALL_CATEGORIES_KEY,
+    CategoryTreeCache,
+    CategoryTreeEntry,
+    category_tree_cache,
+)
@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Optional, Tuple, Union
+import hashlib
+import logging
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import get_settings
+from core.models.categories import CategoryType
+from core.schemas.categories import CategoryListResponse, CategoryResponse
+from core.utils.compression import AVAILABLE_ENCODINGS, MIN_COMPRESS_SIZE, compress
+from core.utils.responses import dump_json
+
+logger = logging.getLogger(__name__)
+
+# Ключ кэша для дерева всех категорий
+ALL_CATEGORIES_KEY = "all"
+
+CategoryCacheKey = Union[CategoryType, str]
+
+
+@dataclass
+class CategoryTreeEntry:
+    response: CategoryListResponse
+    # Сериализованное тело ответа и его ETag, считаются один раз при заполнении
+    body: bytes
+    etag: str
+    created_at: float
+    # Сжатые варианты тела по кодировке, считаются один раз при заполнении
+    compressed: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    async def build(cls, response: CategoryListResponse) -> "CategoryTreeEntry":
+        """
+        Сериализовать ответ и сжать тело во всех доступных кодировках.
+        Сжатие идет в пуле потоков, чтобы не останавливать event loop на большом дереве.
+        """
+        body = dump_json(response)
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        compressed = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = await run_in_threadpool(_compress_variants, body)
+        return cls(response=response, body=body, etag=etag, created_at=time.monotonic(), compressed=compressed)
+
+    def encoded_body(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Тело для клиента с указанной кодировкой и фактически примененная кодировка.
+        Небольшие тела отдаются без сжатия.
+        """
+        body = self.compressed.get(encoding) if encoding is not None else None
+        if body is None:
+            return self.body, None
+        return body, encoding
+
+    @cached_property
+    def slug_index(self) -> Dict[str, CategoryResponse]:
+        """
+        Индекс slug -> категория по всем узлам дерева, строится при первом обращении.
+        """
+        index: Dict[str, CategoryResponse] = {}
+        stack = list(self.response.items)
+        while stack:
+            node = stack.pop()
+            index[node.slug] = CategoryResponse.model_construct(
+                id=node.id,
+                name=node.name,
+                slug=node.slug,
+                parent_id=node.parent_id,
+                type=node.type,
+                is_active=node.is_active,
+                message="Категория успешно найдена",
+            )
+            stack.extend(node.children)
+        return index
+
+
+def _compress_variants(body: bytes) -> Dict[str, bytes]:
+    return {encoding: compress(body, encoding, static=True) for encoding in AVAILABLE_ENCODINGS}
+
+
+class CategoryTreeCache:
+    """
+    Процессный кэш дерева категорий.
+
+    Хранит готовый CategoryListResponse вместе с JSON-телом и ETag
+    по ключу "all" или по типу категории.
+    Любая запись в категории сбрасывает кэш целиком (invalidate), а счетчик
+    поколений не дает запросу, начатому до сброса, положить в кэш устаревшее дерево.
+    TTL ограничивает рассинхронизацию между несколькими воркерами.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        # None — CATEGORY_CACHE_TTL из настроек при первом обращении
+        self._ttl_seconds = ttl_seconds
+        self._entries: Dict[CategoryCacheKey, CategoryTreeEntry] = {}
+        self._generation = 0
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._ttl_seconds is None:
+            self._ttl_seconds = get_settings().CATEGORY_CACHE_TTL
+        return self._ttl_seconds
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: CategoryCacheKey) -> Optional[CategoryTreeEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - entry.created_at > self.ttl_seconds:
+            logger.debug("Category tree cache entry %s expired", key)
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    def set(
+        self,
+        key: CategoryCacheKey,
+        entry: CategoryTreeEntry,
+        generation: int,
+    ) -> None:
+        """
+        Сохранить дерево, если с момента начала загрузки не было сброса.
+        """
+        if generation != self._generation:
+            logger.debug("Skipping stale category tree for key %s", key)
+            return
+        self._entries[key] = entry
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        logger.info("Category tree cache invalidated (generation=%s)", self._generation)
+
+
+category_tree_cache = CategoryTreeCache()
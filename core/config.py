@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 import logging
 import sys
@@ -6,6 +7,18 @@ import sys
 class Settings(BaseSettings):
     DATABASE_URL: str
     DB_ECHO: bool
+    # Реплики для чтения через запятую (пусто — все запросы идут на DATABASE_URL)
+    DATABASE_REPLICA_URLS: str = ""
+    # Сколько секунд после записи читать с primary чтения того же клиента (cookie recent_write)
+    DB_READ_AFTER_WRITE_SECONDS: float = 5.0
+    # Пул соединений (на каждый движок и на каждый воркер)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Запросы дольше порога пишутся в лог с маршрутом (0 — не логировать)
+    DB_SLOW_QUERY_MS: float = 200
 
     # Настройки JWT
     SECRET_KEY: str
@@ -23,13 +36,39 @@ class Settings(BaseSettings):
     PORT: int = 8000
     BASE_URL: str = f"http://{HOST}:{PORT}/api/v1"
     STATIC_URL: str = f"http://{HOST}:{PORT}"
+
+    # Кэш дерева категорий (секунды, 0 — без ограничения по времени)
+    CATEGORY_CACHE_TTL: int = 300
+    # Заполнять кэш дерева категорий и прогревать запрос баннеров при старте
+    PRELOAD_READ_MODELS: bool = True
+
+    # Пагинация списка замеров: размер страницы по умолчанию и максимальный
+    MEASURE_REQUESTS_PAGE_SIZE: int = 50
+    MEASURE_REQUESTS_MAX_PAGE_SIZE: int = 200
     
+    @property
+    def database_replica_urls(self) -> list[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Настройки создаются при первом обращении, а не при импорте модуля:
+    импорт моделей и схем (alembic, скрипты, тесты) не требует .env.
+    """
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Совместимость с `from core.config import settings`; такой импорт читает .env сразу
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 import logging
 import sys
@@ -0,0 +1,23 @@
+__all__ = (
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "InstrumentedAsyncQueuePool",
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "instrument_engine",
+    "registry",
+)
+
+from .registry import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    registry,
+)
+from .pool import (
+    InstrumentedAsyncQueuePool,
+    instrument_engine,
+)
+from .http import MetricsMiddleware
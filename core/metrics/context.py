@@ -0,0 +1,27 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# ASGI scope текущего запроса. Маршрут FastAPI дописывает в scope["route"] уже после
+# входа в middleware, поэтому храним сам scope и читаем шаблон пути лениво.
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+NO_ROUTE = "-"
+
+
+def route_template(scope: Optional[dict]) -> str:
+    """
+    Шаблон пути (/categories/{category_id}), а не сырой путь; без совпавшего маршрута — NO_ROUTE.
+    """
+    if scope is None:
+        return NO_ROUTE
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or NO_ROUTE
+
+
+def current_route() -> str:
+    scope = request_scope.get()
+    if scope is None:
+        return NO_ROUTE
+    return f"{scope.get('method', '')} {route_template(scope)}"
+
@@ -0,0 +1,54 @@
+import time
+
+from core.metrics.context import request_scope, route_template
+from core.metrics.registry import registry
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ("route", "method", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template, method and status",
+    ("route", "method", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed", ("method",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Чистый ASGI middleware: метрики HTTP-запросов и scope запроса в contextvar
+    для кода без доступа к Request (например, обработчиков событий SQLAlchemy).
+
+    Метка route — шаблон пути из scope["route"], который FastAPI заполняет при маршрутизации,
+    поэтому число рядов ограничено числом маршрутов; запросы мимо маршрутов идут в "-".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = request_scope.set(scope)
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            request_scope.reset(token)
+            labels = (route_template(scope), method, str(status))
+            http_requests.inc(*labels)
+            http_request_duration.observe(time.perf_counter() - started, *labels)
@@ -0,0 +1,100 @@
+from typing import Iterable, List, Tuple
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core.metrics.registry import LabelValues, registry
+
+logger = logging.getLogger(__name__)
+
+# Ожидание соединения дольше этого порога пишется в лог как признак насыщения пула
+SLOW_CHECKOUT_SECONDS = 1.0
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Движки, за пулами которых следим: (метка, движок)
+_engines: List[Tuple[str, AsyncEngine]] = []
+
+
+def _pool_gauge(read) -> Iterable[Tuple[LabelValues, float]]:
+    # Пул читается через движок: после dispose() у движка уже новый экземпляр пула
+    return [((name,), read(engine.sync_engine.pool)) for name, engine in _engines]
+
+
+pool_size = registry.gauge(
+    "db_pool_size", "Configured pool size", ("pool",),
+    lambda: _pool_gauge(lambda pool: pool.size()),
+)
+pool_checked_out = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out", ("pool",),
+    lambda: _pool_gauge(lambda pool: pool.checkedout()),
+)
+pool_overflow = registry.gauge(
+    "db_pool_overflow", "Connections opened above pool_size (negative while the pool is not filled)", ("pool",),
+    lambda: _pool_gauge(lambda pool: pool.overflow()),
+)
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("pool",),
+    POOL_WAIT_BUCKETS,
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that failed with pool_timeout", ("pool",),
+)
+pool_connects = registry.counter(
+    "db_pool_connections_created_total", "New DBAPI connections opened by the pool", ("pool",),
+)
+pool_invalidations = registry.counter(
+    "db_pool_invalidations_total", "Connections invalidated (disconnects, failed pre-ping)", ("pool",),
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, который замеряет ожидание свободного соединения.
+
+    События пула срабатывают уже после выдачи соединения, поэтому время
+    в очереди и таймауты считаются вокруг _do_get.
+    """
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.inc(self.metrics_name)
+            logger.error(
+                "Pool %s exhausted: no connection within %ss (size=%d, overflow=%d)",
+                self.metrics_name, self._timeout, self.size(), self.overflow(),
+            )
+            raise
+        waited = time.perf_counter() - started
+        pool_checkout_wait.observe(waited, self.metrics_name)
+        if waited >= SLOW_CHECKOUT_SECONDS:
+            logger.warning(
+                "Waited %.2fs for a connection from pool %s (checked out=%d)",
+                waited, self.metrics_name, self.checkedout(),
+            )
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """
+    Подключает метрики к пулу движка. Пул должен быть InstrumentedAsyncQueuePool.
+    """
+    engine.sync_engine.pool.metrics_name = name
+    _engines.append((name, engine))
+
+    # Слушатели на движке переживают пересоздание пула
+    event.listen(engine.sync_engine, "connect", lambda *args: pool_connects.inc(name))
+    event.listen(engine.sync_engine, "invalidate", lambda *args: pool_invalidations.inc(name))
@@ -0,0 +1,94 @@
+from functools import lru_cache
+import logging
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.metrics.context import current_route
+from core.metrics.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Длина нормализованного SQL в метке метрики и в логе
+MAX_STATEMENT_LENGTH = 200
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+# Параметр с необязательным приведением типа: asyncpg рендерит $1::INTEGER,
+# $2::TIMESTAMP WITHOUT TIME ZONE, $3::VARCHAR COLLATE "C", $4::INTEGER[],
+# $5::NUMERIC(10, 2) (числа в длине к этому моменту уже заменены на ?)
+_PARAM = r'(?:\$\d+|%s|\?)(?:::[A-Za-z_][\w ]*(?:\(\?(?:, \?)?\))?(?:\[\])?(?: COLLATE "\w+")?)?'
+# Списки параметров переменной длины (IN (...), VALUES (...), (...)) схлопываются в один
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+# Одинаковые подряд строки VALUES (...), (...) схлопываются в одну
+_REPEATED_ROWS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time by normalized statement", ("statement",),
+)
+slow_statements = registry.counter(
+    "db_slow_statements_total", "Statements slower than DB_SLOW_QUERY_MS by route", ("route",),
+)
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """
+    Приводит SQL к виду без литералов и с постоянной длиной списков параметров,
+    чтобы одинаковые по форме запросы попадали в один ряд метрики.
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PARAM_LIST.sub("(?)", sql)
+    sql = _REPEATED_ROWS.sub(r"\1", sql)
+    if len(sql) > MAX_STATEMENT_LENGTH:
+        sql = sql[:MAX_STATEMENT_LENGTH] + "…"
+    return sql
+
+
+def redact_parameters(parameters, executemany: bool) -> str:
+    """
+    Параметры без значений: только их типы (или число строк для executemany).
+    """
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + ")"
+    return "<redacted>"
+
+
+def instrument_statements(engine: AsyncEngine, slow_query_ms: float) -> None:
+    """
+    Замер каждого запроса движка и лог медленных запросов (slow_query_ms <= 0 — без лога).
+    """
+    threshold = slow_query_ms / 1000
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+        normalized = normalize_sql(statement)
+        statement_duration.observe(elapsed, normalized)
+        if 0 < threshold <= elapsed:
+            route = current_route()
+            slow_statements.inc(route)
+            logger.warning(
+                "Slow query %.1f ms route=%s: %s params=%s",
+                elapsed * 1000, route, normalized, redact_parameters(parameters, executemany),
+            )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # Упавший запрос не доходит до after_cursor_execute: снимаем его отметку времени
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("statement_started"):
+            connection.info["statement_started"].pop()
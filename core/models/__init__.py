@@ -17,7 +17,7 @@ __all__ = (
     "MeasureRequestStatus",
     "Banner",
     "DatabaseHelper",
-    "db_helper",
+    "get_db_helper",
 )
 
 from .base import Base
@@ -33,4 +33,4 @@ from .project_images import ProjectImage
 from .project_products import ProjectProduct
 from .measure_requests import MeasureRequest, MeasureRequestStatus
 from .banners import Banner
-from .db_helper import DatabaseHelper, db_helper
+from .db_helper import DatabaseHelper, get_db_helper
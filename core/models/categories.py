@@ -6,6 +6,8 @@ from sqlalchemy import (
     ForeignKey,
     Enum,
     Boolean,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,6 +23,11 @@ class CategoryType(str, enum.Enum):
 # 2. Модель Category
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("idx_categories_path", "path"),
+        # Поиск занятых slug по префиксу диапазоном в сортировке "C" (core.utils.slug)
+        Index("idx_categories_slug_c", text('slug COLLATE "C"')),
+    )
 
     # ID категории
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +44,14 @@ class Category(Base):
     created_at = Column(DateTime, default=datetime.now, nullable=False)
     # Признак активности
     is_active = Column(Boolean, default=True, nullable=False)
+    # Материализованный путь из id предков, например "/1/5/12/"
+    # Сортировка "C" нужна, чтобы поиск поддерева по диапазону шел по btree-индексу.
+    # default "/" — только заглушка для первого INSERT в CategoryRepository.create_category
+    # (id еще неизвестен): путь перезаписывается до commit. В БД умолчания нет:
+    # строка с path "/" попала бы в поддерево любой категории
+    path = Column(String(collation="C"), nullable=False, default="/")
+    # Глубина в дереве (у корневых категорий 0)
+    depth = Column(Integer, nullable=False, default=0)
 
     # Связи
     parent = relationship("Category", remote_side=[id], back_populates="children")
@@ -1,52 +1,156 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Sequence
 from asyncio import current_task
+from functools import lru_cache
+import asyncio
 import logging
+import time
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
     async_scoped_session,
+    AsyncEngine,
     AsyncSession,
 )
-from sqlalchemy.pool import AsyncAdaptedQueuePool
-from sqlalchemy import text
 
-from core.config import settings
+from core.config import get_settings
+from core.metrics.pool import InstrumentedAsyncQueuePool, instrument_engine
+from core.metrics.statements import instrument_statements
+from core.utils.read_your_writes import client_wrote_recently, mark_write
 
 logger = logging.getLogger(__name__)
 
+
 class DatabaseHelper:
-    def __init__(self, url: str, echo: bool = False):
+    """
+    Основной движок (primary) для записи и необязательный набор реплик для чтения.
+
+    Чтения распределяются по репликам по кругу. Чтения клиента, который недавно
+    писал (commit на primary), идут на primary, чтобы он сразу видел свои изменения
+    несмотря на задержку репликации; окно ведет ReadYourWritesMiddleware через cookie.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        replica_urls: Sequence[str] = (),
+        read_after_write_seconds: float = 0,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        slow_query_ms: float = 0,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.pool_options = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+        }
+        self.engine = self._create_engine(url, echo, "primary")
+        self.session_factory = self._create_session_factory(self.engine)
+
+        self.replica_engines = [
+            self._create_engine(replica_url, echo, f"replica{index}")
+            for index, replica_url in enumerate(replica_urls)
+        ]
+        self.replica_session_factories = [
+            self._create_session_factory(engine) for engine in self.replica_engines
+        ]
+        self.read_after_write_seconds = read_after_write_seconds
+        self._replica_index = 0
+        event.listen(self.engine.sync_engine, "commit", self._mark_write)
+
+    def _create_engine(self, url: str, echo: bool, name: str) -> AsyncEngine:
         # Определяем, нужен ли SSL (для локальной БД не нужен)
         connect_args = {
             "command_timeout": 60,  # 60 second timeout
+            # Схема задается в стартовом пакете соединения: один раз на физическое
+            # соединение и без отдельного запроса SET search_path
             "server_settings": {
-                "search_path": "kuhni_marina,public"  # Устанавливаем схему по умолчанию
+                "search_path": "kuhni_marina,public"
             }
         }
-        
+
         # Если URL содержит SSL параметры, добавляем SSL в connect_args
         if "sslmode=require" in url or "ssl=require" in url:
             connect_args["ssl"] = "require"
-        
-        self.engine = create_async_engine(
+
+        engine = create_async_engine(
             url=url,
             echo=echo,
-            poolclass=AsyncAdaptedQueuePool,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            pool_recycle=1800,
-            pool_pre_ping=True,  # Enable connection testing
+            poolclass=InstrumentedAsyncQueuePool,
             connect_args=connect_args,
+            **self.pool_options,
         )
-        self.session_factory = async_sessionmaker(
-            bind=self.engine,
+        instrument_engine(engine, name)
+        instrument_statements(engine, self.slow_query_ms)
+        return engine
+
+    @staticmethod
+    def _create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
+    @staticmethod
+    def _mark_write(connection) -> None:
+        mark_write()
+
+    def get_read_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        """
+        Фабрика сессий для чтения: следующая реплика по кругу или primary,
+        если реплик нет или клиент текущего запроса недавно писал.
+        """
+        if not self.replica_session_factories:
+            return self.session_factory
+        if self.read_after_write_seconds > 0 and client_wrote_recently():
+            logger.debug("Read routed to primary within read-your-writes window")
+            return self.session_factory
+        self._replica_index = (self._replica_index + 1) % len(self.replica_session_factories)
+        return self.replica_session_factories[self._replica_index]
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.engine, *self.replica_engines]
+
+    async def warm_up(self) -> None:
+        """
+        Открывает pool_size соединений каждого движка параллельно и возвращает их в пул,
+        чтобы первые запросы после старта не ждали установки соединений.
+        """
+        size = self.pool_options["pool_size"]
+        for engine in self.engines:
+            started = time.perf_counter()
+            connections = await asyncio.gather(
+                *(engine.connect() for _ in range(size)),
+                return_exceptions=True,
+            )
+            opened = [conn for conn in connections if not isinstance(conn, BaseException)]
+            await asyncio.gather(*(conn.close() for conn in opened))
+            for error in connections:
+                if isinstance(error, BaseException):
+                    logger.warning("Pool warm-up for %s failed: %s", engine.url.render_as_string(), error)
+                    break
+            logger.info(
+                "Opened %d/%d connections to %s in %.0f ms",
+                len(opened), size, engine.url.render_as_string(), (time.perf_counter() - started) * 1000,
+            )
+
+    async def dispose(self) -> None:
+        """
+        Закрывает соединения всех движков (при остановке приложения).
+        """
+        await asyncio.gather(*(engine.dispose() for engine in self.engines))
+
     def get_scoped_session(self):
         session = async_scoped_session(
             session_factory=self.session_factory,
@@ -54,13 +158,18 @@ class DatabaseHelper:
         )
         return session
 
+    async def read_session_dependency(self) -> AsyncGenerator[AsyncSession, None]:
+        session = self.get_read_session_factory()()
+        try:
+            yield session
+        finally:
+            await session.close()
+
     async def session_dependency(self) -> AsyncGenerator[AsyncSession, None]:
+        # search_path приходит из server_settings, а живость соединения проверяет pool_pre_ping,
+        # поэтому сессия не делает служебных запросов перед рабочими
         session = self.session_factory()
         try:
-            # Устанавливаем search_path для схемы kuhni_marina
-            await session.execute(text("SET search_path TO kuhni_marina, public"))
-            # Test the connection
-            await session.execute(text("SELECT 1"))
             yield session
         except Exception as e:
             logger.error(f"Database connection error: {str(e)}")
@@ -70,7 +179,29 @@ class DatabaseHelper:
             await session.close()
 
 
-db_helper = DatabaseHelper(
-    url=settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-)
+@lru_cache(maxsize=1)
+def get_db_helper() -> DatabaseHelper:
+    """
+    Движки создаются при первом обращении (в lifespan или первом запросе),
+    а не при импорте core.models.
+    """
+    settings = get_settings()
+    return DatabaseHelper(
+        url=settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        replica_urls=settings.database_replica_urls,
+        read_after_write_seconds=settings.DB_READ_AFTER_WRITE_SECONDS,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        slow_query_ms=settings.DB_SLOW_QUERY_MS,
+    )
+
+
+def __getattr__(name: str):
+    # Совместимость с `from core.models.db_helper import db_helper`
+    if name == "db_helper":
+        return get_db_helper()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
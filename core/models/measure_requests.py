@@ -7,6 +7,8 @@ from sqlalchemy import (
     ForeignKey,
     Enum,
     Text,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -21,6 +23,34 @@ class MeasureRequestStatus(str, enum.Enum):
     CANCELLED = "CANCELLED"
 
 
+# Разрешенные переходы статуса: выполненная заявка закрыта, отмененную можно вернуть в работу
+MEASURE_REQUEST_STATUS_TRANSITIONS = {
+    MeasureRequestStatus.NEW: {
+        MeasureRequestStatus.IN_PROGRESS,
+        MeasureRequestStatus.DONE,
+        MeasureRequestStatus.CANCELLED,
+    },
+    MeasureRequestStatus.IN_PROGRESS: {
+        MeasureRequestStatus.NEW,
+        MeasureRequestStatus.DONE,
+        MeasureRequestStatus.CANCELLED,
+    },
+    MeasureRequestStatus.DONE: set(),
+    MeasureRequestStatus.CANCELLED: {MeasureRequestStatus.NEW},
+}
+
+
+def allowed_previous_statuses(target: MeasureRequestStatus) -> list[MeasureRequestStatus]:
+    """
+    Статусы, из которых можно перейти в target (включая сам target — повторная установка не ошибка).
+    """
+    return [
+        current
+        for current, targets in MEASURE_REQUEST_STATUS_TRANSITIONS.items()
+        if current == target or target in targets
+    ]
+
+
 # 11. Модель MeasureRequest
 class MeasureRequest(Base):
     __tablename__ = "measure_requests"
@@ -42,3 +72,15 @@ class MeasureRequest(Base):
     # Дата создания
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
+    __table_args__ = (
+        # Списки по статусу в порядке created_at DESC, id
+        Index("idx_measure_requests_status_created_at", status, created_at.desc(), id),
+        # Открытые заявки (NEW, IN_PROGRESS)
+        Index(
+            "idx_measure_requests_open_created_at",
+            created_at.desc(),
+            id,
+            postgresql_where=text("status IN ('NEW', 'IN_PROGRESS')"),
+        ),
+    )
+
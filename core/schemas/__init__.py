@@ -8,9 +8,15 @@ from .attributes import (
 from .categories import (
     CategoryCreateRequest,
     CategoryUpdateRequest,
+    CategoryMoveRequest,
     CategoryResponse,
     CategoryTreeNode,
     CategoryListResponse,
+    CategoryAncestorsResponse,
+    CategoryImportItem,
+    CategoryBulkImportRequest,
+    CategoryImportResult,
+    CategoryBulkImportResponse,
     CategoryDeleteResponse,
 )
 from .banners import (
@@ -24,6 +30,9 @@ from .measure_requests import (
     MeasureRequestCreateRequest,
     MeasureRequestUpdateRequest,
     MeasureRequestStatusUpdateRequest,
+    MeasureRequestBulkStatusRequest,
+    MeasureRequestBulkStatusResponse,
+    MeasureRequestExportFormat,
     MeasureRequestResponse,
     MeasureRequestListResponse,
 )
@@ -31,12 +40,15 @@ from .measure_requests import (
 __all__ = [
     "AttributeCreateRequest", "AttributeUpdateRequest",
     "AttributeResponse", "AttributeListResponse", "AttributeDeleteResponse",
-    "CategoryCreateRequest", "CategoryUpdateRequest",
+    "CategoryCreateRequest", "CategoryUpdateRequest", "CategoryMoveRequest",
     "CategoryResponse", "CategoryTreeNode", "CategoryListResponse",
-    "CategoryDeleteResponse",
+    "CategoryAncestorsResponse", "CategoryImportItem",
+    "CategoryBulkImportRequest", "CategoryImportResult",
+    "CategoryBulkImportResponse", "CategoryDeleteResponse",
     "BannerCreateRequest", "BannerUpdateRequest",
     "BannerResponse", "BannerListResponse", "BannerDeleteResponse",
     "MeasureRequestCreateRequest", "MeasureRequestUpdateRequest",
-    "MeasureRequestStatusUpdateRequest", "MeasureRequestResponse",
+    "MeasureRequestStatusUpdateRequest", "MeasureRequestBulkStatusRequest",
+    "MeasureRequestBulkStatusResponse", "MeasureRequestExportFormat", "MeasureRequestResponse",
     "MeasureRequestListResponse",
 ]
\ No newline at end of file
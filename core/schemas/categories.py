@@ -29,6 +29,11 @@ class CategoryUpdateRequest(BaseSchema):
     is_active: Optional[bool] = None
 
 
+class CategoryMoveRequest(BaseSchema):
+    # None — сделать категорию корневой
+    parent_id: Optional[int] = None
+
+
 class CategoryResponse(CategoryBase):
     id: int
     is_active: bool = True
@@ -44,8 +49,42 @@ class CategoryListResponse(BaseSchema):
     message: Optional[str] = None
 
 
+class CategoryImportItem(BaseSchema):
+    # Ключ категории на стороне клиента (например, код из ERP)
+    key: str
+    name: str
+    slug: Optional[str] = None
+    # Родитель из этой же пачки (по ключу) или уже существующая категория (по id)
+    parent_key: Optional[str] = None
+    parent_id: Optional[int] = None
+    type: CategoryType
+    is_active: bool = True
+
+
+class CategoryBulkImportRequest(BaseSchema):
+    items: List[CategoryImportItem] = Field(min_length=1, max_length=1000)
+
+
+class CategoryImportResult(BaseSchema):
+    key: str
+    id: int
+    slug: str
+    parent_id: Optional[int] = None
+
+
+class CategoryBulkImportResponse(BaseSchema):
+    items: List[CategoryImportResult]
+    message: Optional[str] = None
+
+
+class CategoryAncestorsResponse(BaseSchema):
+    items: List[CategoryResponse]
+    message: Optional[str] = None
+
+
 class CategoryDeleteResponse(BaseSchema):
     category_id: int
+    deactivated_ids: List[int] = Field(default_factory=list)
     message: Optional[str] = None
 
 
@@ -1,5 +1,8 @@
 from typing import List, Optional
 from datetime import date, datetime
+import enum
+
+from pydantic import Field
 
 from .base import BaseSchema
 from core.models.measure_requests import MeasureRequestStatus
@@ -31,6 +34,27 @@ class MeasureRequestStatusUpdateRequest(BaseSchema):
     status: MeasureRequestStatus
 
 
+class MeasureRequestBulkStatusRequest(BaseSchema):
+    ids: List[int] = Field(min_length=1, max_length=1000)
+    status: MeasureRequestStatus
+
+
+class MeasureRequestBulkStatusResponse(BaseSchema):
+    status: MeasureRequestStatus
+    # Переведены в новый статус
+    updated: List[int]
+    # Существуют, но переход из текущего статуса запрещен
+    skipped: List[int]
+    # Не найдены
+    missing: List[int]
+    message: Optional[str] = None
+
+
+class MeasureRequestExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 class MeasureRequestResponse(MeasureRequestBase):
     id: int
     status: MeasureRequestStatus
@@ -40,5 +64,9 @@ class MeasureRequestResponse(MeasureRequestBase):
 
 class MeasureRequestListResponse(BaseSchema):
     items: List[MeasureRequestResponse]
+    # Курсор следующей страницы; None — страница последняя
+    next_cursor: Optional[str] = None
+    # Оценка общего числа замеров по статистике PostgreSQL (только при with_total)
+    total_estimate: Optional[int] = None
     message: Optional[str] = None
 
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Tuple
+import base64
+import binascii
+import json
+
+
+def encode_cursor(created_at: datetime, entity_id: int) -> str:
+    """
+    Кодирует позицию последней строки страницы (created_at, id) в непрозрачную строку.
+    """
+    raw = json.dumps([created_at.isoformat(), entity_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Декодирует курсор из encode_cursor.
+
+    Raises:
+        ValueError: если курсор поврежден или получен не из encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, entity_id = json.loads(raw)
+        if not isinstance(entity_id, int) or isinstance(entity_id, bool):
+            raise ValueError("cursor id must be an integer")
+        return datetime.fromisoformat(created_at), entity_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
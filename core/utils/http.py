@@ -0,0 +1,27 @@
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет, совпадает ли заголовок If-None-Match с ETag ресурса.
+
+    Args:
+        if_none_match: Значение заголовка If-None-Match (может быть списком через запятую или "*")
+        etag: Текущий ETag ресурса в кавычках
+
+    Returns:
+        True, если клиент уже имеет актуальную версию ресурса
+    """
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # Для If-None-Match используется слабое сравнение
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,114 @@
+from contextvars import ContextVar
+from typing import Optional
+import math
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+
+from core.config import get_settings
+
+# Cookie с моментом (unix time), до которого чтения клиента идут на primary
+RECENT_WRITE_COOKIE = "recent_write"
+
+
+class WriteState:
+    """
+    Состояние запроса для маршрутизации чтений: пришел ли клиент с недавней записью
+    и был ли в этом запросе commit на primary.
+    """
+
+    __slots__ = ("wrote_recently", "committed")
+
+    def __init__(self, wrote_recently: bool = False):
+        self.wrote_recently = wrote_recently
+        self.committed = False
+
+
+# Объект изменяется на месте: событие commit SQLAlchemy выполняется в greenlet
+# с тем же контекстом, но без доступа к Request
+write_state: ContextVar[Optional[WriteState]] = ContextVar("write_state", default=None)
+
+# Число commit на primary в этом процессе; меняется с каждой записью
+_write_generation = 0
+
+
+def write_generation() -> int:
+    return _write_generation
+
+
+def mark_write() -> None:
+    """
+    Отметить commit на primary: в текущем запросе (ответ получит cookie) и в процессе.
+    """
+    global _write_generation
+    _write_generation += 1
+    state = write_state.get()
+    if state is not None:
+        state.committed = True
+
+
+def client_wrote_recently() -> bool:
+    """
+    True, если клиент текущего запроса недавно писал или уже писал в этом запросе.
+    Вне запроса (lifespan, скрипты) — False.
+    """
+    state = write_state.get()
+    return state is not None and (state.wrote_recently or state.committed)
+
+
+def parse_recent_write(cookie_header: Optional[str], now: float) -> bool:
+    if not cookie_header:
+        return False
+    value = cookie_parser(cookie_header).get(RECENT_WRITE_COOKIE)
+    try:
+        return value is not None and float(value) > now
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    Чистый ASGI middleware: после запроса с записью ставит клиенту короткоживущую cookie,
+    и в течение DB_READ_AFTER_WRITE_SECONDS его чтения идут на primary, а не на реплику.
+
+    Окно привязано к клиенту, а не к процессу: работает с любым числом воркеров
+    и не уводит на primary чтения остальных клиентов. Без реплик cookie тоже ставится:
+    по ней GET клиента не присоединяется к чужому чтению (core.utils.single_flight).
+    """
+
+    def __init__(self, app, window_seconds: Optional[float] = None):
+        self.app = app
+        # None — DB_READ_AFTER_WRITE_SECONDS из настроек
+        self._window_seconds = window_seconds
+
+    @property
+    def window_seconds(self) -> float:
+        # Настройки читаются при первом запросе, а не при импорте main
+        if self._window_seconds is None:
+            self._window_seconds = get_settings().DB_READ_AFTER_WRITE_SECONDS
+        return self._window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        state = WriteState(parse_recent_write(Headers(scope=scope).get("cookie"), now))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.committed:
+                expires = time.time() + self.window_seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{RECENT_WRITE_COOKIE}={expires:.3f}; Max-Age={math.ceil(self.window_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        token = write_state.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            write_state.reset(token)
@@ -0,0 +1,32 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import orjson
+
+# Z вместо +00:00 у UTC-дат — как при сериализации через Pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Сериализует модель Pydantic, dict или list в JSON через orjson без валидации.
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class ORJSONModelResponse(JSONResponse):
+    """
+    JSON-ответ через orjson для уже собранных моделей ответа.
+
+    Если эндпоинт возвращает Response, FastAPI не прогоняет результат повторно
+    через response_model (валидация + jsonable_encoder). Поэтому модель, собранная
+    в сервисе через model_construct из данных БД, сериализуется ровно один раз.
+    response_model у маршрута остается для документации OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
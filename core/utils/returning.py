@@ -0,0 +1,41 @@
+from typing import Optional, Type, TypeVar
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: Type[T],
+    condition,
+    values: dict,
+) -> Optional[T]:
+    """
+    UPDATE ... WHERE condition RETURNING * и commit: один запрос вместо SELECT + UPDATE + refresh.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        model: Модель обновляемой таблицы
+        condition: Условие WHERE (должно выбирать не более одной строки)
+        values: Новые значения колонок
+
+    Returns:
+        Обновленная сущность или None, если условие не выбрало строк (транзакция откатывается)
+    """
+    query = (
+        update(model)
+        .where(condition)
+        .values(**values)
+        .returning(model)
+        # Объект из identity map (если уже загружен в запросе) обновляется значениями из RETURNING
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await session.execute(query)
+    entity = result.scalar_one_or_none()
+    if entity is None:
+        await session.rollback()
+        return None
+    await session.commit()
+    return entity
@@ -0,0 +1,126 @@
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+import asyncio
+import hashlib
+import logging
+
+from fastapi import Request
+
+from core.metrics.context import route_template
+from core.metrics.registry import registry
+from core.utils.read_your_writes import client_wrote_recently, write_generation
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+coalesced_requests = registry.counter(
+    "http_coalesced_requests_total", "Requests served by joining an identical in-flight call", ("route",),
+)
+
+
+def _copy_exception(exc: BaseException) -> BaseException:
+    """
+    Копия исключения с теми же args и атрибутами, без вызова __init__
+    (у HTTPException и подобных он не повторяется по args).
+    """
+    clone = type(exc).__new__(type(exc), *exc.args)
+    clone.__dict__.update(exc.__dict__)
+    clone.args = exc.args
+    return clone
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых параллельных вызовов: пока вызов с ключом выполняется,
+    остальные вызовы с тем же ключом ждут его результат (или копию его исключения)
+    вместо собственного обращения к БД. После завершения ключ освобождается — это не кэш.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Выполнить call или присоединиться к уже идущему вызову с тем же ключом.
+
+        Returns:
+            Результат и признак того, что он получен от другого запроса
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                # shield: отмена ожидающего запроса не отменяет общий вызов
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Ведущий запрос отменен (клиент отключился) — выполняем вызов сами
+                logger.debug("Single-flight leader for %s was cancelled, retrying", key)
+            except Exception as exc:
+                # Свой объект исключения у каждого ожидающего: иначе трейсбеки всех
+                # запросов дописываются в одно исключение ведущего
+                raise _copy_exception(exc) from exc
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Ожидающих может не быть: помечаем исключение полученным, чтобы asyncio не ругался
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+
+
+read_coalescer = SingleFlight()
+
+
+def request_key(request: Request) -> Tuple[str, ...]:
+    """
+    Ключ идентичности запроса: метод, шаблон маршрута, параметры пути и запроса
+    и область авторизации (хэш заголовка Authorization), чтобы ответы разных
+    пользователей никогда не смешивались.
+    """
+    authorization = request.headers.get("authorization", "")
+    auth_scope = hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest() if authorization else ""
+    return (
+        request.method,
+        route_template(request.scope),
+        repr(sorted(request.path_params.items())),
+        repr(sorted(request.query_params.multi_items())),
+        auth_scope,
+    )
+
+
+async def coalesce(request: Request, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Выполнить вызов сервиса для идемпотентного GET, объединяя одинаковые параллельные запросы.
+
+    Сессия БД открывает соединение только при первом запросе, поэтому присоединившиеся
+    запросы не берут соединение из пула.
+
+    Чтение не должно вернуть данные старше записи клиента: клиент в окне read-after-write
+    (core.utils.read_your_writes) читает сам, а поколение записей процесса в ключе
+    не дает присоединиться к чтению, начатому до последнего commit.
+    """
+    if client_wrote_recently():
+        return await call()
+    key = (*request_key(request), write_generation())
+    result, shared = await read_coalescer.do(key, call)
+    if shared:
+        coalesced_requests.inc(key[1])
+    return result
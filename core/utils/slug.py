@@ -1,10 +1,76 @@
-from typing import Optional, Type
-from sqlalchemy import select
+from typing import Awaitable, Callable, List, Optional, Sequence, Type, TypeVar
+import logging
+
+from sqlalchemy import ARRAY, String, and_, func, literal, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
 from slugify import slugify as slugify_func
 
+logger = logging.getLogger(__name__)
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+# Запас под суффикс "-N" при обрезке длинного slug
+MAX_SUFFIX_LENGTH = 8
+# Сколько раз повторять запись при гонке за один и тот же slug
+SLUG_WRITE_ATTEMPTS = 5
+# SQLSTATE нарушения уникальности в PostgreSQL
+UNIQUE_VIOLATION = "23505"
+# Максимальный символ Unicode: в сортировке "C" больше любого продолжения префикса
+PREFIX_UPPER_BOUND = chr(0x10FFFF)
+
+
+def make_base_slug(text: str, max_length: int = 255) -> str:
+    """
+    Генерирует базовый slug из текста (без проверки уникальности).
+    """
+    # python-slugify поддерживает max_length и word_boundary
+    # max_length=0 означает без ограничения, поэтому используем наше значение
+    base_slug = slugify_func(
+        text,
+        lowercase=True,
+        separator='-',
+        max_length=max_length if max_length > 0 else 0,
+        word_boundary=True
+    )
+    # Если slug пустой, используем дефолтное значение
+    return base_slug or "item"
+
+
+def with_suffix(base_slug: str, counter: int, max_length: int = 255) -> str:
+    """
+    Добавляет к slug суффикс "-N", обрезая базу, чтобы уложиться в max_length.
+    """
+    suffix = f"-{counter}"
+    return f"{base_slug[:max_length - len(suffix)]}{suffix}"
+
+
+def slug_prefix_filter(model: Type[DeclarativeBase], prefix):
+    """
+    Условие "slug начинается с prefix" в виде диапазона [prefix, prefix || U+10FFFF)
+    в сортировке "C". В отличие от LIKE 'prefix%' при не-C сортировке базы такой диапазон
+    обслуживает индекс по (slug COLLATE "C") и с параметром в подготовленном запросе.
+    """
+    slug = model.slug.collate("C")
+    return and_(slug >= prefix, slug < prefix + PREFIX_UPPER_BOUND)
+
+
+def pick_free_slug(base_slug: str, taken: set[str], max_length: int = 255) -> str:
+    """
+    Выбирает первый свободный вариант из base, base-1, base-2, ... по набору занятых slug.
+    """
+    if base_slug not in taken:
+        return base_slug
+    counter = 1
+    while True:
+        slug = with_suffix(base_slug, counter, max_length)
+        if slug not in taken:
+            return slug
+        counter += 1
+
 
 async def generate_unique_slug(
     session: AsyncSession,
@@ -15,59 +81,142 @@ async def generate_unique_slug(
 ) -> str:
     """
     Генерирует уникальный slug из текста для указанной модели.
-    
+
+    Все занятые варианты base и base-N выбираются одним запросом по префиксу,
+    свободный суффикс подбирается в памяти. Гонку между параллельными вставками
+    закрывает уникальный индекс и повтор в save_with_unique_slug.
+
     Args:
         session: Асинхронная сессия SQLAlchemy
         model: Модель SQLAlchemy, у которой есть поле slug
         text: Исходный текст для генерации slug
         exclude_id: ID записи, которую нужно исключить из проверки (для обновления)
         max_length: Максимальная длина slug
-        
+
     Returns:
         Уникальный slug
     """
-    # Генерируем базовый slug из текста
-    # python-slugify поддерживает max_length и word_boundary
-    # max_length=0 означает без ограничения, поэтому используем наше значение
-    base_slug = slugify_func(
-        text,
-        lowercase=True,
-        separator='-',
-        max_length=max_length if max_length > 0 else 0,
-        word_boundary=True
+    base_slug = make_base_slug(text, max_length)
+
+    # Все кандидаты (включая обрезанные под суффикс) начинаются с этого префикса
+    prefix = base_slug[:max_length - MAX_SUFFIX_LENGTH]
+    query = select(model.slug).where(slug_prefix_filter(model, prefix))
+
+    # Исключаем текущую запись при обновлении
+    if exclude_id is not None:
+        query = query.where(model.id != exclude_id)
+
+    result = await session.execute(query)
+    taken = set(result.scalars().all())
+    return pick_free_slug(base_slug, taken, max_length)
+
+
+def is_slug_conflict(exc: IntegrityError) -> bool:
+    """
+    Проверяет, что IntegrityError вызван нарушением уникальности slug.
+    """
+    return getattr(exc.orig, "sqlstate", None) == UNIQUE_VIOLATION and "slug" in str(exc.orig)
+
+
+async def generate_unique_slugs(
+    session: AsyncSession,
+    model: Type[DeclarativeBase],
+    texts: Sequence[str],
+    max_length: int = 255,
+) -> List[str]:
+    """
+    Генерирует уникальные slug для пачки текстов одним запросом.
+    Slug уникальны как относительно БД, так и внутри пачки.
+
+    Префиксы передаются одним массивом (unnest), поэтому текст запроса не зависит
+    от размера пачки: один план и один ряд метрики db_statement_duration_seconds.
+    """
+    if not texts:
+        return []
+    base_slugs = [make_base_slug(text, max_length) for text in texts]
+    prefixes = sorted({base_slug[:max_length - MAX_SUFFIX_LENGTH] for base_slug in base_slugs})
+    prefix_values = func.unnest(literal(prefixes, ARRAY(String))).table_valued("prefix").render_derived("prefixes")
+    query = (
+        select(model.slug)
+        .distinct()
+        .join(prefix_values, slug_prefix_filter(model, prefix_values.c.prefix))
+    )
+    result = await session.execute(query)
+    taken = set(result.scalars().all())
+
+    slugs = []
+    for base_slug in base_slugs:
+        slug = pick_free_slug(base_slug, taken, max_length)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+async def _retry_on_slug_conflict(
+    session: AsyncSession,
+    allocate: Callable[[], Awaitable[S]],
+    write: Callable[[S], Awaitable[T]],
+    attempts: int,
+) -> T:
+    for attempt in range(1, attempts + 1):
+        slugs = await allocate()
+        try:
+            # Запись идет в SAVEPOINT: при конфликте откатывается только она,
+            # а транзакция и взятые в ней блокировки (lock_category_tree) сохраняются
+            async with session.begin_nested():
+                return await write(slugs)
+        except IntegrityError as exc:
+            if not is_slug_conflict(exc) or attempt == attempts:
+                raise
+            logger.warning("Slug %s was taken concurrently, retrying (attempt %d)", slugs, attempt)
+
+
+async def save_with_unique_slug(
+    session: AsyncSession,
+    model: Type[DeclarativeBase],
+    text: str,
+    write: Callable[[str], Awaitable[T]],
+    exclude_id: Optional[int] = None,
+    attempts: int = SLUG_WRITE_ATTEMPTS,
+) -> T:
+    """
+    Подбирает slug и выполняет запись; если параллельный запрос успел занять
+    тот же slug, откатывает запись до SAVEPOINT и повторяет с новым slug.
+    commit остается за вызывающим кодом.
+
+    Args:
+        session: Асинхронная сессия SQLAlchemy
+        model: Модель SQLAlchemy, у которой есть поле slug
+        text: Исходный текст для генерации slug
+        write: Корутина, которая записывает сущность с переданным slug (без commit)
+        exclude_id: ID записи, которую нужно исключить из проверки (для обновления)
+        attempts: Максимальное число попыток
+
+    Returns:
+        Результат write
+    """
+    return await _retry_on_slug_conflict(
+        session,
+        lambda: generate_unique_slug(session, model, text, exclude_id),
+        write,
+        attempts,
+    )
+
+
+async def save_with_unique_slugs(
+    session: AsyncSession,
+    model: Type[DeclarativeBase],
+    texts: Sequence[str],
+    write: Callable[[List[str]], Awaitable[T]],
+    attempts: int = SLUG_WRITE_ATTEMPTS,
+) -> T:
+    """
+    Пакетный вариант save_with_unique_slug: write получает slug для каждого текста
+    в том же порядке и записывает всю пачку (без commit).
+    """
+    return await _retry_on_slug_conflict(
+        session,
+        lambda: generate_unique_slugs(session, model, texts),
+        write,
+        attempts,
     )
-    
-    if not base_slug:
-        # Если slug пустой, используем дефолтное значение
-        base_slug = "item"
-    
-    # Проверяем уникальность
-    slug = base_slug
-    counter = 1
-    
-    while True:
-        # Формируем запрос для проверки существования slug
-        query = select(model).where(model.slug == slug)
-        
-        # Исключаем текущую запись при обновлении
-        if exclude_id is not None:
-            query = query.where(model.id != exclude_id)
-        
-        result = await session.execute(query)
-        existing = result.scalar_one_or_none()
-        
-        # Если slug уникален, возвращаем его
-        if existing is None:
-            return slug
-        
-        # Если slug уже существует, добавляем суффикс
-        # Обрезаем базовый slug, чтобы оставить место для суффикса
-        suffix = f"-{counter}"
-        available_length = max_length - len(suffix)
-        truncated_base = base_slug[:available_length] if len(base_slug) > available_length else base_slug
-        slug = f"{truncated_base}{suffix}"
-        counter += 1
-        
-        # Защита от бесконечного цикла (на практике не должно произойти)
-        if counter > 10000:
-            raise ValueError(f"Не удалось сгенерировать уникальный slug для '{text}' после 10000 попыток")
@@ -34,11 +34,15 @@ CREATE TABLE categories (
     parent_id INTEGER REFERENCES categories(id),
     type category_type NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    is_active BOOLEAN NOT NULL DEFAULT TRUE
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    path TEXT COLLATE "C" NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE INDEX idx_categories_slug ON categories(slug);
 CREATE INDEX idx_categories_parent_id ON categories(parent_id);
+CREATE INDEX idx_categories_path ON categories(path);
+CREATE INDEX idx_categories_slug_c ON categories((slug COLLATE "C"));
 
 -- 4. Создание таблицы products
 CREATE TABLE products (
@@ -146,6 +150,9 @@ CREATE TABLE measure_requests (
 
 CREATE INDEX idx_measure_requests_status ON measure_requests(status);
 CREATE INDEX idx_measure_requests_created_at ON measure_requests(created_at);
+CREATE INDEX idx_measure_requests_status_created_at ON measure_requests(status, created_at DESC, id);
+CREATE INDEX idx_measure_requests_open_created_at ON measure_requests(created_at DESC, id)
+    WHERE status IN ('NEW', 'IN_PROGRESS');
 
 -- 13. Создание таблицы banners
 CREATE TABLE banners (
@@ -0,0 +1,58 @@
+from typing import Dict, Iterable, Optional, Type, TypeVar
+import logging
+
+from sqlalchemy import ARRAY, Integer, any_, inspect, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class EntityLoader:
+    """
+    Загрузчик сущностей по id поверх identity map сессии.
+
+    Сессия создается один раз на запрос (get_async_session кэшируется FastAPI
+    в рамках запроса), поэтому все репозитории из api/deps.py разделяют один
+    identity map: повторный get_*_by_id в том же запросе не ходит в БД,
+    а get_many догружает только отсутствующие строки одним WHERE id = ANY(...).
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _cached(self, model: Type[T], entity_id: int) -> Optional[T]:
+        key = self.session.identity_key(model, entity_id)
+        entity = self.session.identity_map.get(key)
+        if entity is None or inspect(entity).expired:
+            return None
+        return entity
+
+    async def get(self, model: Type[T], entity_id: int) -> Optional[T]:
+        """
+        Получить сущность по id; из identity map, если она уже загружена в этом запросе.
+        """
+        return await self.session.get(model, entity_id)
+
+    async def get_many(self, model: Type[T], entity_ids: Iterable[int]) -> Dict[int, T]:
+        """
+        Получить сущности по списку id: уже загруженные берутся из identity map,
+        остальные — одним запросом. Отсутствующие в БД id в результат не попадают.
+        """
+        found: Dict[int, T] = {}
+        missing = []
+        for entity_id in dict.fromkeys(entity_ids):
+            entity = self._cached(model, entity_id)
+            if entity is None:
+                missing.append(entity_id)
+            else:
+                found[entity_id] = entity
+
+        if missing:
+            logger.debug("Loading %d %s rows by id (%d from identity map)", len(missing), model.__name__, len(found))
+            query = select(model).where(model.id == any_(literal(missing, ARRAY(Integer))))
+            result = await self.session.execute(query)
+            for entity in result.scalars().all():
+                found[entity.id] = entity
+        return found
@@ -1,16 +1,24 @@
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.models.db_helper import db_helper
-
-async_session = db_helper.session_factory
+from core.models.db_helper import get_db_helper
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    from sqlalchemy import text
-    async with async_session() as session:
+    # search_path задается один раз на физическое соединение (server_settings в DatabaseHelper),
+    # поэтому на каждый запрос дополнительных обращений к БД нет
+    async with get_db_helper().session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для GET-эндпоинтов: реплика, если она настроена и недавно не было записи.
+    """
+    async with get_db_helper().get_read_session_factory()() as session:
         try:
-            # Устанавливаем search_path для схемы kuhni_marina
-            await session.execute(text("SET search_path TO kuhni_marina, public"))
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
@@ -1,12 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1.routers import api_router
-from core.config import settings
+from api.lifespan import lifespan
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.openapi.utils import get_openapi
 from core.config import setup_logging
 from fastapi.staticfiles import StaticFiles
-from core.config import settings
+from core.config import get_settings
+from core.metrics import registry
+from core.metrics.http import MetricsMiddleware
+from core.utils.compression import CompressionMiddleware
+from core.utils.read_your_writes import ReadYourWritesMiddleware
 
 # Настраиваем логирование
 setup_logging()
@@ -25,6 +29,7 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    lifespan=lifespan,
 )
 
 # Настройка CORS
@@ -36,12 +41,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Чтения клиента после его записи идут на primary, а не на реплику (cookie recent_write)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Сжатие ответов gzip/brotli (кэшированные тела категорий сжимаются заранее)
+app.add_middleware(CompressionMiddleware)
+
+# Метрики запросов и контекст запроса для лога медленных SQL-запросов
+app.add_middleware(MetricsMiddleware)
+
 # Настройка статических файлов
 # app.mount("/assets", StaticFiles(directory="assets"), name="assets")
 
 # Подключаем роутеры API v1
 app.include_router(api_router, prefix="/api/v1")
 
+
+# Метрики в формате Prometheus (вне /api/v1 и OpenAPI)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Готовность для балансировщика: 503 до окончания прогрева и во время остановки
+@app.get("/ready", include_in_schema=False)
+async def ready(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 # --- Настройка авторизации для OpenAPI ---
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
@@ -73,6 +102,7 @@ app.openapi = custom_openapi
 
 if __name__ == "__main__":
     import uvicorn
+    settings = get_settings()
     uvicorn.run(
         "main:app",
         host=settings.HOST,
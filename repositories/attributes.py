@@ -6,6 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.models.attributes import Attribute
 from core.schemas.attributes import AttributeCreateRequest, AttributeUpdateRequest
+from core.utils.returning import update_returning
+from db.entity_loader import EntityLoader
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,7 @@ logger = logging.getLogger(__name__)
 class AttributeRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.loader = EntityLoader(session)
 
     async def get_all_attributes(self) -> List[Attribute]:
         """
@@ -30,9 +33,7 @@ class AttributeRepository:
         Получить атрибут по идентификатору.
         """
         logger.info("Fetching attribute with id %s", attribute_id)
-        query = select(Attribute).where(Attribute.id == attribute_id)
-        result = await self.session.execute(query)
-        attribute = result.scalar_one_or_none()
+        attribute = await self.loader.get(Attribute, attribute_id)
 
         if attribute is None:
             logger.warning("Attribute with id %s not found", attribute_id)
@@ -62,17 +63,16 @@ class AttributeRepository:
         Обновить атрибут по идентификатору.
         """
         logger.info("Updating attribute with id %s", attribute_id)
-        attribute = await self.get_attribute_by_id(attribute_id)
+        attribute = await update_returning(
+            self.session,
+            Attribute,
+            Attribute.id == attribute_id,
+            {"name": request.name, "unit": request.unit},
+        )
         if attribute is None:
             logger.warning("Attribute with id %s not found for update", attribute_id)
             return None
 
-        attribute.name = request.name
-        attribute.unit = request.unit
-
-        await self.session.commit()
-        await self.session.refresh(attribute)
-
         logger.info("Attribute with id %s successfully updated", attribute_id)
         return attribute
 
@@ -6,6 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.models.banners import Banner
 from core.schemas.banners import BannerCreateRequest, BannerUpdateRequest
+from core.utils.returning import update_returning
+from db.entity_loader import EntityLoader
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +15,7 @@ logger = logging.getLogger(__name__)
 class BannerRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.loader = EntityLoader(session)
 
     async def get_all_active_banners(self) -> List[Banner]:
         """
@@ -30,9 +33,7 @@ class BannerRepository:
         Получить баннер по идентификатору.
         """
         logger.info("Fetching banner with id %s", banner_id)
-        query = select(Banner).where(Banner.id == banner_id)
-        result = await self.session.execute(query)
-        banner = result.scalar_one_or_none()
+        banner = await self.loader.get(Banner, banner_id)
 
         if banner is None:
             logger.warning("Banner with id %s not found", banner_id)
@@ -65,20 +66,20 @@ class BannerRepository:
         Обновить баннер по идентификатору.
         """
         logger.info("Updating banner with id %s", banner_id)
-        banner = await self.get_banner_by_id(banner_id)
+        values = {
+            "title": request.title,
+            "image_url": request.image_url,
+            "link_url": request.link_url,
+            "position": request.position,
+        }
+        if request.is_active is not None:
+            values["is_active"] = request.is_active
+
+        banner = await update_returning(self.session, Banner, Banner.id == banner_id, values)
         if banner is None:
             logger.warning("Banner with id %s not found for update", banner_id)
             return None
 
-        banner.title = request.title
-        banner.image_url = request.image_url
-        banner.link_url = request.link_url
-        banner.position = request.position
-        banner.is_active = request.is_active if request.is_active is not None else banner.is_active
-
-        await self.session.commit()
-        await self.session.refresh(banner)
-
         logger.info("Banner with id %s successfully updated", banner_id)
         return banner
 
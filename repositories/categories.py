@@ -1,28 +1,61 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import logging
 
-from sqlalchemy import select
+from sqlalchemy import ARRAY, Integer, Row, and_, any_, cast, func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from core.models.categories import Category, CategoryType
-from core.schemas.categories import CategoryCreateRequest, CategoryUpdateRequest
-from core.utils.slug import generate_unique_slug
+from core.schemas.categories import (
+    CategoryCreateRequest,
+    CategoryUpdateRequest,
+    CategoryImportItem,
+)
+from core.utils.slug import generate_unique_slug, save_with_unique_slug, save_with_unique_slugs
+from db.entity_loader import EntityLoader
 
 logger = logging.getLogger(__name__)
 
+# Ключ advisory-блокировки, сериализующей изменения структуры дерева категорий
+CATEGORY_TREE_LOCK_ID = 7_301_001
+
+# (path, depth) "родителя" корневых категорий
+ROOT_POSITION = ("/", -1)
+
+# Колонки, достаточные для построения дерева; читаются как кортежи без ORM-объектов
+TREE_COLUMNS = (
+    Category.id,
+    Category.name,
+    Category.slug,
+    Category.parent_id,
+    Category.type,
+    Category.is_active,
+)
+
+
+def _subtree_filter(path):
+    """
+    Условие "category.path лежит в поддереве path".
+    Пути состоят из цифр и "/", а ":" в сортировке "C" идет сразу после них,
+    поэтому поддерево — это диапазон [path, path || ':'), который обслуживает btree-индекс.
+    """
+    return and_(Category.path >= path, Category.path < path + ":")
+
 
 class CategoryRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.loader = EntityLoader(session)
 
-    async def get_all_categories(self, include_inactive: bool = False) -> List[Category]:
+    async def get_all_categories(self, include_inactive: bool = False) -> List[Row]:
+        """
+        Получить все категории плоским списком строк TREE_COLUMNS.
+        """
         logger.info("Fetching all categories (include_inactive=%s)", include_inactive)
-        query = select(Category).options(selectinload(Category.children)).order_by(Category.parent_id, Category.id)
+        query = select(*TREE_COLUMNS).order_by(Category.parent_id, Category.id)
         if not include_inactive:
             query = query.where(Category.is_active.is_(True))
         result = await self.session.execute(query)
-        categories = result.scalars().unique().all()
+        categories = result.all()
         logger.info("Retrieved %d categories", len(categories))
         return categories
 
@@ -30,22 +63,24 @@ class CategoryRepository:
         self,
         category_type: CategoryType,
         include_inactive: bool = False,
-    ) -> List[Category]:
+    ) -> List[Row]:
+        """
+        Получить категории указанного типа плоским списком строк TREE_COLUMNS.
+        """
         logger.info(
             "Fetching categories by type %s (include_inactive=%s)",
             category_type,
             include_inactive,
         )
         query = (
-            select(Category)
-            .options(selectinload(Category.children))
+            select(*TREE_COLUMNS)
             .where(Category.type == category_type)
             .order_by(Category.parent_id, Category.id)
         )
         if not include_inactive:
             query = query.where(Category.is_active.is_(True))
         result = await self.session.execute(query)
-        categories = result.scalars().unique().all()
+        categories = result.all()
         logger.info("Retrieved %d categories of type %s", len(categories), category_type)
         return categories
 
@@ -59,17 +94,152 @@ class CategoryRepository:
             category_id,
             include_inactive,
         )
+        category = await self.loader.get(Category, category_id)
+        if category is not None and not include_inactive and not category.is_active:
+            category = None
+        if category is None:
+            logger.warning("Category with id %s not found", category_id)
+        return category
+
+    async def get_category_by_slug(
+        self,
+        slug: str,
+        include_inactive: bool = False,
+    ) -> Optional[Category]:
+        logger.info(
+            "Fetching category with slug '%s' (include_inactive=%s)",
+            slug,
+            include_inactive,
+        )
+        query = select(Category).where(Category.slug == slug)
+        if not include_inactive:
+            query = query.where(Category.is_active.is_(True))
+        result = await self.session.execute(query)
+        category = result.scalar_one_or_none()
+        if category is None:
+            logger.warning("Category with slug '%s' not found", slug)
+        return category
+
+    async def get_categories_by_ids(
+        self,
+        category_ids: Sequence[int],
+        include_inactive: bool = False,
+    ) -> List[Category]:
+        """
+        Получить категории по списку идентификаторов одним запросом.
+        """
+        logger.info(
+            "Fetching %d categories by ids (include_inactive=%s)",
+            len(category_ids),
+            include_inactive,
+        )
+        loaded = await self.loader.get_many(Category, category_ids)
+        categories = [
+            category
+            for category in loaded.values()
+            if include_inactive or category.is_active
+        ]
+        logger.info("Retrieved %d of %d requested categories", len(categories), len(category_ids))
+        return categories
+
+    async def get_category_subtree(
+        self,
+        category_id: int,
+        depth: Optional[int] = None,
+        include_inactive: bool = False,
+    ) -> List[Row]:
+        """
+        Получить категорию и её потомков не глубже depth уровней одним запросом
+        по материализованному пути (строки TREE_COLUMNS).
+        """
+        logger.info(
+            "Fetching subtree of category %s (depth=%s, include_inactive=%s)",
+            category_id,
+            depth,
+            include_inactive,
+        )
+        node = (
+            select(Category.path, Category.depth)
+            .where(Category.id == category_id)
+            .cte(name="node")
+        )
+        query = (
+            select(*TREE_COLUMNS)
+            .join(node, _subtree_filter(node.c.path))
+            .order_by(Category.depth, Category.id)
+        )
+        if depth is not None:
+            query = query.where(Category.depth <= node.c.depth + depth)
+        if not include_inactive:
+            query = query.where(Category.is_active.is_(True))
+        result = await self.session.execute(query)
+        categories = result.all()
+        logger.info("Retrieved %d categories in subtree of %s", len(categories), category_id)
+        return categories
+
+    async def get_category_ancestors(
+        self,
+        category_id: int,
+        include_inactive: bool = False,
+    ) -> List[Category]:
+        """
+        Получить цепочку категорий от корня до указанной (включительно) одним запросом:
+        id предков берутся из материализованного пути и ищутся по первичному ключу.
+        """
+        logger.info(
+            "Fetching ancestors of category %s (include_inactive=%s)",
+            category_id,
+            include_inactive,
+        )
+        node_path = select(Category.path).where(Category.id == category_id).scalar_subquery()
+        ancestor_ids = cast(func.string_to_array(func.btrim(node_path, "/"), "/"), ARRAY(Integer))
         query = (
             select(Category)
-            .options(selectinload(Category.children))
-            .where(Category.id == category_id)
+            .where(Category.id == any_(ancestor_ids))
+            .order_by(Category.depth)
         )
         if not include_inactive:
             query = query.where(Category.is_active.is_(True))
         result = await self.session.execute(query)
-        category = result.scalars().unique().one_or_none()
-        if category is None:
-            logger.warning("Category with id %s not found", category_id)
+        categories = result.scalars().all()
+        logger.info("Retrieved %d categories in path of %s", len(categories), category_id)
+        return categories
+
+    async def get_ancestor_ids(self, category_id: int) -> List[int]:
+        """
+        Получить id категории и всех её предков одним рекурсивным запросом по parent_id.
+        Не зависит от материализованного пути, поэтому годится для проверки циклов.
+        """
+        logger.info("Fetching ancestor chain of category %s", category_id)
+        chain = (
+            select(Category.id, Category.parent_id)
+            .where(Category.id == category_id)
+            .cte(name="chain", recursive=True)
+        )
+        # UNION (а не UNION ALL) останавливает обход, если в данных уже есть цикл
+        chain = chain.union(
+            select(Category.id, Category.parent_id).where(Category.id == chain.c.parent_id)
+        )
+        result = await self.session.execute(select(chain.c.id))
+        ancestor_ids = list(result.scalars().all())
+        logger.info("Category %s has %d categories in its chain", category_id, len(ancestor_ids))
+        return ancestor_ids
+
+    async def lock_category_tree(self) -> None:
+        """
+        Взять транзакционную advisory-блокировку структуры дерева (перемещения и создание
+        под родителем). Пути и предков нужно читать уже после неё: иначе два встречных
+        перемещения могут создать цикл, а параллельное перемещение предка — устаревший path.
+        Блокировка держится до конца транзакции.
+        """
+        logger.info("Acquiring category tree lock")
+        await self.session.execute(select(func.pg_advisory_xact_lock(CATEGORY_TREE_LOCK_ID)))
+
+    async def reload_category(self, category: Category) -> Category:
+        """
+        Перечитать строку категории из БД (например, после lock_category_tree).
+        """
+        await self.session.refresh(category)
         return category
 
     async def generate_unique_slug(self, text: str, exclude_id: Optional[int] = None) -> str:
@@ -88,72 +258,254 @@ class CategoryRepository:
     async def create_category(
         self,
         name: str,
-        slug: str,
+        slug_source: str,
         category_type: CategoryType,
         parent_id: Optional[int] = None,
         is_active: bool = True,
     ) -> Category:
-        logger.info("Creating category with slug '%s', type=%s (value=%s)", slug, category_type, category_type.value)
-        # SQLAlchemy должен автоматически использовать .value для Enum,
-        # но явно передаем Enum объект, чтобы SQLAlchemy правильно его обработал
-        category = Category(
-            name=name,
-            slug=slug,
-            parent_id=parent_id,
-            type=category_type,
-            is_active=is_active,
-        )
-        self.session.add(category)
+        """
+        Создать категорию; slug генерируется из slug_source и перевыбирается,
+        если параллельный запрос успел его занять.
+        При parent_id вызывается под lock_category_tree.
+        """
+        logger.info("Creating category from slug source '%s', type=%s (value=%s)", slug_source, category_type, category_type.value)
+
+        async def write(slug: str) -> Category:
+            # SQLAlchemy должен автоматически использовать .value для Enum,
+            # но явно передаем Enum объект, чтобы SQLAlchemy правильно его обработал
+            category = Category(
+                name=name,
+                slug=slug,
+                parent_id=parent_id,
+                type=category_type,
+                is_active=is_active,
+            )
+            self.session.add(category)
+            # Путь строится из id, поэтому сначала получаем id вставкой
+            await self.session.flush()
+            parent_path, parent_depth = await self._get_parent_path(parent_id)
+            category.path = f"{parent_path}{category.id}/"
+            category.depth = parent_depth + 1
+            return category
+
+        category = await save_with_unique_slug(self.session, Category, slug_source, write)
         await self.session.commit()
         await self.session.refresh(category)
-        logger.info("Category created with id %s", category.id)
+        logger.info("Category created with id %s and slug '%s'", category.id, category.slug)
         return category
 
+    async def bulk_create_categories(self, items: Sequence[CategoryImportItem]) -> List[Row]:
+        """
+        Создать пачку категорий в одной транзакции.
+
+        items должны быть упорядочены так, чтобы родитель из пачки шел раньше детей.
+        Вызывается под lock_category_tree: пути существующих родителей читаются одним запросом.
+        id выделяются заранее из последовательности, поэтому path и depth известны до вставки,
+        и вся пачка уходит одним многострочным INSERT ... RETURNING.
+
+        Returns:
+            Строки (id, slug, parent_id) в порядке items
+        """
+        logger.info("Bulk creating %d categories", len(items))
+        sequence = func.pg_get_serial_sequence(Category.__tablename__, "id")
+        id_query = select(func.nextval(sequence)).select_from(func.generate_series(1, len(items)))
+        result = await self.session.execute(id_query)
+        ids = list(result.scalars().all())
+        parent_positions = await self._get_positions(
+            [item.parent_id for item in items if item.parent_key is None and item.parent_id is not None]
+        )
+
+        rows = []
+        placed: dict[str, dict] = {}
+        for item, category_id in zip(items, ids):
+            if item.parent_key is not None:
+                parent = placed[item.parent_key]
+                parent_id, parent_path, parent_depth = parent["id"], parent["path"], parent["depth"]
+            else:
+                parent_id = item.parent_id
+                parent_path, parent_depth = parent_positions[parent_id] if parent_id is not None else ROOT_POSITION
+            row = {
+                "id": category_id,
+                "name": item.name,
+                "parent_id": parent_id,
+                "type": item.type,
+                "is_active": item.is_active,
+                "path": f"{parent_path}{category_id}/",
+                "depth": parent_depth + 1,
+            }
+            placed[item.key] = row
+            rows.append(row)
+
+        slug_sources = [item.slug if item.slug and item.slug.strip() else item.name for item in items]
+
+        async def write(slugs: List[str]) -> List[Row]:
+            query = insert(Category).returning(
+                Category.id,
+                Category.slug,
+                Category.parent_id,
+                sort_by_parameter_order=True,
+            )
+            result = await self.session.execute(
+                query,
+                [{**row, "slug": slug} for row, slug in zip(rows, slugs)],
+            )
+            return list(result.all())
+
+        created = await save_with_unique_slugs(self.session, Category, slug_sources, write)
+        await self.session.commit()
+        logger.info("Bulk created %d categories", len(created))
+        return created
+
     async def update_category(
         self,
         category_id: int,
         name: str,
         category_type: CategoryType,
-        slug: str,
+        slug_source: Optional[str] = None,
         parent_id: Optional[int] = None,
         is_active: Optional[bool] = None,
     ) -> Optional[Category]:
         """
         Обновить категорию по идентификатору.
+        Если передан slug_source, slug перегенерируется из него, иначе остается прежним.
+        При смене родителя вызывается под lock_category_tree; если родитель не меняется,
+        parent_id совпадает с загруженным и UPDATE его не затрагивает.
         """
         logger.info("Updating category with id %s", category_id)
-        category = await self.get_category_by_id(category_id, include_inactive=True)
+
+        async def write(slug: Optional[str]) -> Optional[Category]:
+            category = await self.get_category_by_id(category_id, include_inactive=True)
+            if category is None:
+                logger.warning("Category with id %s not found for update", category_id)
+                return None
+
+            category.name = name
+            if slug is not None:
+                category.slug = slug
+            category.type = category_type
+            if category.parent_id != parent_id:
+                await self._move_subtree(category, parent_id)
+            category.parent_id = parent_id
+            if is_active is not None:
+                category.is_active = is_active
+            return category
+
+        if slug_source is None:
+            category = await write(None)
+        else:
+            category = await save_with_unique_slug(
+                self.session, Category, slug_source, write, exclude_id=category_id
+            )
         if category is None:
-            logger.warning("Category with id %s not found for update", category_id)
             return None
 
-        category.name = name
-        category.slug = slug
-        category.type = category_type
-        category.parent_id = parent_id
-        if is_active is not None:
-            category.is_active = is_active
-
         await self.session.commit()
         await self.session.refresh(category)
-
         logger.info("Category with id %s successfully updated", category_id)
         return category
 
-    async def deactivate_category(self, category_id: int) -> bool:
-        logger.info("Deactivating category with id %s", category_id)
+    async def move_category(self, category_id: int, parent_id: Optional[int]) -> Optional[Category]:
+        """
+        Перенести категорию под нового родителя. path и depth поддерева
+        пересчитываются одним UPDATE; вызывается под lock_category_tree,
+        проверка циклов выполняется сервисом заранее в той же транзакции.
+        """
+        logger.info("Moving category %s under %s", category_id, parent_id)
         category = await self.get_category_by_id(category_id, include_inactive=True)
         if category is None:
+            logger.warning("Category with id %s not found for move", category_id)
+            return None
+
+        if category.parent_id != parent_id:
+            await self._move_subtree(category, parent_id)
+            category.parent_id = parent_id
+
+        await self.session.commit()
+        await self.session.refresh(category)
+        logger.info("Category %s successfully moved", category_id)
+        return category
+
+    async def deactivate_category(self, category_id: int) -> List[int]:
+        """
+        Деактивировать категорию и всё её поддерево одним запросом
+        (WITH RECURSIVE ... UPDATE ... RETURNING id).
+
+        Returns:
+            Список идентификаторов деактивированных категорий (пустой, если категория не найдена)
+        """
+        logger.info("Deactivating category with id %s", category_id)
+        subtree = (
+            select(Category.id)
+            .where(Category.id == category_id)
+            .cte(name="subtree", recursive=True)
+        )
+        # UNION (а не UNION ALL) защищает от зацикливания на битых данных
+        subtree = subtree.union(
+            select(Category.id).where(Category.parent_id == subtree.c.id)
+        )
+        query = (
+            update(Category)
+            .where(Category.id.in_(select(subtree.c.id)))
+            .values(is_active=False)
+            .returning(Category.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self.session.execute(query)
+        deactivated_ids = list(result.scalars().all())
+        if not deactivated_ids:
             logger.warning("Category with id %s not found for deactivation", category_id)
-            return False
+            return []
 
-        self._mark_inactive_recursive(category)
         await self.session.commit()
-        logger.info("Category with id %s successfully deactivated", category_id)
-        return True
+        logger.info(
+            "Category with id %s successfully deactivated (%d categories affected)",
+            category_id,
+            len(deactivated_ids),
+        )
+        return deactivated_ids
 
-    def _mark_inactive_recursive(self, category: Category) -> None:
-        category.is_active = False
-        for child in category.children:
-            self._mark_inactive_recursive(child)
+    async def _get_positions(self, category_ids: Sequence[int]) -> dict[int, tuple[str, int]]:
+        """
+        Прочитать актуальные (path, depth) категорий одним запросом.
+        Значения берутся из БД, а не из identity map: объект мог быть загружен
+        до lock_category_tree, и его path уже устарел.
+        """
+        if not category_ids:
+            return {}
+        query = select(Category.id, Category.path, Category.depth).where(
+            Category.id == any_(literal(list(dict.fromkeys(category_ids)), ARRAY(Integer)))
+        )
+        result = await self.session.execute(query)
+        return {row.id: (row.path, row.depth) for row in result.all()}
+
+    async def _get_parent_path(self, parent_id: Optional[int]) -> tuple[str, int]:
+        """
+        Вернуть актуальные путь и глубину родителя; для корня — ROOT_POSITION.
+        """
+        if parent_id is None:
+            return ROOT_POSITION
+        positions = await self._get_positions([parent_id])
+        return positions[parent_id]
 
+    async def _move_subtree(self, category: Category, new_parent_id: Optional[int]) -> None:
+        """
+        Перенести категорию под нового родителя, обновив path и depth всего поддерева одним UPDATE.
+        Старый путь категории и путь родителя перечитываются одним запросом под блокировкой дерева.
+        """
+        category_ids = [category.id] if new_parent_id is None else [category.id, new_parent_id]
+        positions = await self._get_positions(category_ids)
+        old_path, old_depth = positions[category.id]
+        parent_path, parent_depth = positions[new_parent_id] if new_parent_id is not None else ROOT_POSITION
+        new_path = f"{parent_path}{category.id}/"
+        depth_delta = parent_depth + 1 - old_depth
+        logger.info("Moving subtree %s from '%s' to '%s'", category.id, old_path, new_path)
+        query = (
+            update(Category)
+            .where(_subtree_filter(old_path))
+            .values(
+                path=new_path + func.substr(Category.path, len(old_path) + 1),
+                depth=Category.depth + depth_delta,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        await self.session.execute(query)
@@ -1,40 +1,140 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+import json
 import logging
 
-from sqlalchemy import select
+from sqlalchemy import ARRAY, Integer, Row, and_, any_, literal, or_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.models.measure_requests import MeasureRequest, MeasureRequestStatus
+from core.models.measure_requests import (
+    MeasureRequest,
+    MeasureRequestStatus,
+    allowed_previous_statuses,
+)
 from core.schemas.measure_requests import (
     MeasureRequestCreateRequest,
     MeasureRequestUpdateRequest,
 )
+from core.utils.returning import update_returning
+from db.entity_loader import EntityLoader
 
 logger = logging.getLogger(__name__)
 
+# Колонки выгрузки: плоские строки без ORM-объектов и identity map
+EXPORT_COLUMNS = (
+    MeasureRequest.id,
+    MeasureRequest.full_name,
+    MeasureRequest.phone,
+    MeasureRequest.address,
+    MeasureRequest.preferred_date,
+    MeasureRequest.comment,
+    MeasureRequest.status,
+    MeasureRequest.created_at,
+)
+EXPORT_BATCH_SIZE = 1000
+
 
 class MeasureRequestRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.loader = EntityLoader(session)
 
     async def get_all_measure_requests(
-        self, status: Optional[MeasureRequestStatus] = None
+        self,
+        status: Optional[MeasureRequestStatus] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
     ) -> List[MeasureRequest]:
         """
-        Получить список всех замеров с опциональной фильтрацией по статусу.
+        Получить замеры с опциональной фильтрацией по статусу (новые сначала).
+
+        Args:
+            status: Фильтр по статусу
+            limit: Максимальное число строк (None — все)
+            after: (created_at, id) последней строки предыдущей страницы;
+                   страница продолжается сразу после неё (keyset-пагинация)
         """
-        logger.info("Fetching all measure requests with status filter: %s", status)
+        logger.info("Fetching measure requests with status filter: %s, limit: %s", status, limit)
         query = select(MeasureRequest)
         
         if status is not None:
             query = query.where(MeasureRequest.status == status)
+
+        if after is not None:
+            # Порядок created_at DESC, id ASC: следующая строка либо старше,
+            # либо с той же датой и большим id. OR сам по себе не становится границей
+            # индекса, поэтому отдельное created_at <= :created_at задает начало скана
+            # (Index Cond), а OR лишь отсекает строки с той же датой — без OFFSET-поведения.
+            created_at, last_id = after
+            query = query.where(
+                and_(
+                    MeasureRequest.created_at <= created_at,
+                    or_(MeasureRequest.created_at < created_at, MeasureRequest.id > last_id),
+                )
+            )
         
         query = query.order_by(MeasureRequest.created_at.desc(), MeasureRequest.id)
+        if limit is not None:
+            query = query.limit(limit)
         result = await self.session.execute(query)
         measure_requests = result.scalars().all()
         logger.info("Retrieved %d measure requests", len(measure_requests))
         return measure_requests
 
+    async def estimate_measure_requests_count(
+        self, status: Optional[MeasureRequestStatus] = None
+    ) -> int:
+        """
+        Оценка числа замеров по статистике планировщика (без полного COUNT по таблице).
+        """
+        query = select(MeasureRequest.id)
+        if status is not None:
+            query = query.where(MeasureRequest.status == status)
+        compiled = query.compile(dialect=self.session.bind.dialect, compile_kwargs={"literal_binds": True})
+        result = await self.session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        # Верхний узел плана содержит оценку числа строк всего запроса
+        estimate = plan[0]["Plan"]["Plan Rows"]
+        logger.info("Estimated %s measure requests with status filter: %s", estimate, status)
+        return int(estimate)
+
+    async def stream_measure_requests(
+        self,
+        status: Optional[MeasureRequestStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Потоково читать замеры пачками по batch_size строк через серверный курсор
+        (старые сначала). В памяти одновременно находится только одна пачка.
+
+        Args:
+            status: Фильтр по статусу
+            created_from: Нижняя граница created_at (включительно)
+            created_to: Верхняя граница created_at (не включительно)
+        """
+        logger.info(
+            "Streaming measure requests: status=%s, from=%s, to=%s", status, created_from, created_to
+        )
+        query = select(*EXPORT_COLUMNS)
+        if status is not None:
+            query = query.where(MeasureRequest.status == status)
+        if created_from is not None:
+            query = query.where(MeasureRequest.created_at >= created_from)
+        if created_to is not None:
+            query = query.where(MeasureRequest.created_at < created_to)
+        query = query.order_by(MeasureRequest.created_at, MeasureRequest.id).execution_options(yield_per=batch_size)
+
+        result = await self.session.stream(query)
+        total = 0
+        async for partition in result.partitions():
+            total += len(partition)
+            yield partition
+        logger.info("Streamed %d measure requests", total)
+
     async def get_measure_request_by_id(
         self, measure_request_id: int
     ) -> Optional[MeasureRequest]:
@@ -42,9 +142,7 @@ class MeasureRequestRepository:
         Получить замер по идентификатору.
         """
         logger.info("Fetching measure request with id %s", measure_request_id)
-        query = select(MeasureRequest).where(MeasureRequest.id == measure_request_id)
-        result = await self.session.execute(query)
-        measure_request = result.scalar_one_or_none()
+        measure_request = await self.loader.get(MeasureRequest, measure_request_id)
 
         if measure_request is None:
             logger.warning("Measure request with id %s not found", measure_request_id)
@@ -78,48 +176,92 @@ class MeasureRequestRepository:
     ) -> Optional[MeasureRequest]:
         """
         Обновить замер.
+
+        Смена статуса проходит ту же проверку переходов, что и update_measure_request_status.
+        None — замер не найден или переход статуса запрещен.
         """
         logger.info("Updating measure request with id %s", measure_request_id)
-        measure_request = await self.get_measure_request_by_id(measure_request_id)
+        # Обновляются только переданные поля
+        values = request.model_dump(exclude_none=True)
+        if not values:
+            return await self.get_measure_request_by_id(measure_request_id)
+
+        condition = MeasureRequest.id == measure_request_id
+        if "status" in values:
+            condition = and_(condition, MeasureRequest.status.in_(allowed_previous_statuses(values["status"])))
+        measure_request = await update_returning(self.session, MeasureRequest, condition, values)
         if measure_request is None:
-            logger.warning("Measure request with id %s not found for update", measure_request_id)
+            logger.warning("Measure request with id %s not updated", measure_request_id)
             return None
 
-        if request.full_name is not None:
-            measure_request.full_name = request.full_name
-        if request.phone is not None:
-            measure_request.phone = request.phone
-        if request.address is not None:
-            measure_request.address = request.address
-        if request.preferred_date is not None:
-            measure_request.preferred_date = request.preferred_date
-        if request.comment is not None:
-            measure_request.comment = request.comment
-        if request.status is not None:
-            measure_request.status = request.status
-
-        await self.session.commit()
-        await self.session.refresh(measure_request)
-
         logger.info("Measure request with id %s successfully updated", measure_request_id)
         return measure_request
 
     async def update_measure_request_status(
-        self, measure_request_id: int, status: MeasureRequestStatus
+        self,
+        measure_request_id: int,
+        status: MeasureRequestStatus,
+        enforce_transitions: bool = True,
     ) -> Optional[MeasureRequest]:
         """
-        Обновить статус замера.
+        Обновить статус замера одним UPDATE ... RETURNING.
+
+        При enforce_transitions недопустимый переход (например, DONE -> NEW) отсекается
+        условием WHERE того же запроса. None — замер не найден или переход запрещен.
         """
         logger.info("Updating measure request status with id %s to %s", measure_request_id, status)
-        measure_request = await self.get_measure_request_by_id(measure_request_id)
+        condition = MeasureRequest.id == measure_request_id
+        if enforce_transitions:
+            condition = and_(condition, MeasureRequest.status.in_(allowed_previous_statuses(status)))
+
+        measure_request = await update_returning(self.session, MeasureRequest, condition, {"status": status})
         if measure_request is None:
-            logger.warning("Measure request with id %s not found for status update", measure_request_id)
+            logger.warning("Measure request with id %s not updated to status %s", measure_request_id, status)
             return None
 
-        measure_request.status = status
-        await self.session.commit()
-        await self.session.refresh(measure_request)
-
         logger.info("Measure request status with id %s successfully updated to %s", measure_request_id, status)
         return measure_request
 
+    async def bulk_update_status(
+        self,
+        measure_request_ids: List[int],
+        status: MeasureRequestStatus,
+        enforce_transitions: bool = True,
+    ) -> List[Tuple[int, bool]]:
+        """
+        Перевести пачку замеров в статус одним запросом.
+
+        CTE target блокирует найденные строки (FOR UPDATE), CTE updated выполняет
+        UPDATE ... WHERE id = ANY(:ids) RETURNING id для строк с допустимым переходом.
+        Результат — (id, обновлен ли) для каждого существующего id; отсутствующих в нем нет.
+        """
+        logger.info("Bulk updating %d measure requests to status %s", len(measure_request_ids), status)
+        target = (
+            select(MeasureRequest.id, MeasureRequest.status)
+            .where(MeasureRequest.id == any_(literal(measure_request_ids, ARRAY(Integer))))
+            .with_for_update()
+            .cte("target")
+        )
+        condition = MeasureRequest.id == target.c.id
+        if enforce_transitions:
+            condition = and_(condition, target.c.status.in_(allowed_previous_statuses(status)))
+        updated = (
+            update(MeasureRequest)
+            .where(condition)
+            .values(status=status)
+            .returning(MeasureRequest.id)
+            .cte("updated")
+        )
+        query = (
+            select(target.c.id, updated.c.id.is_not(None))
+            .select_from(target.outerjoin(updated, updated.c.id == target.c.id))
+            .order_by(target.c.id)
+        )
+        result = await self.session.execute(query)
+        rows = [(row[0], row[1]) for row in result.all()]
+        await self.session.commit()
+        logger.info(
+            "Bulk status update: %d updated, %d found",
+            sum(1 for _, is_updated in rows if is_updated), len(rows),
+        )
+        return rows
@@ -24,8 +24,9 @@ class AttributeService:
         """
         logger.info("Fetching all attributes via service")
         attributes = await self.repository.get_all_attributes()
+        # Данные из БД уже соответствуют схеме: собираем ответ без повторной валидации
         items = [
-            AttributeResponse(
+            AttributeResponse.model_construct(
                 id=attribute.id,
                 name=attribute.name,
                 unit=attribute.unit,
@@ -34,7 +35,7 @@ class AttributeService:
             for attribute in attributes
         ]
 
-        response = AttributeListResponse(
+        response = AttributeListResponse.model_construct(
             items=items,
             message="Список атрибутов успешно получен",
         )
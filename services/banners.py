@@ -24,8 +24,9 @@ class BannerService:
         """
         logger.info("Fetching all active banners via service")
         banners = await self.repository.get_all_active_banners()
+        # Данные из БД уже соответствуют схеме: собираем ответ без повторной валидации
         items = [
-            BannerResponse(
+            BannerResponse.model_construct(
                 id=banner.id,
                 title=banner.title,
                 image_url=banner.image_url,
@@ -37,7 +38,7 @@ class BannerService:
             for banner in banners
         ]
 
-        response = BannerListResponse(
+        response = BannerListResponse.model_construct(
             items=items,
             message="Список баннеров успешно получен",
         )
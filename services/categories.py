@@ -1,15 +1,27 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy import Row
 
+from core.cache.categories import (
+    ALL_CATEGORIES_KEY,
+    CategoryTreeEntry,
+    category_tree_cache,
+)
 from core.models.categories import CategoryType
 from core.schemas.categories import (
     CategoryCreateRequest,
     CategoryUpdateRequest,
+    CategoryMoveRequest,
     CategoryResponse,
     CategoryTreeNode,
     CategoryListResponse,
+    CategoryAncestorsResponse,
+    CategoryImportItem,
+    CategoryBulkImportRequest,
+    CategoryImportResult,
+    CategoryBulkImportResponse,
     CategoryDeleteResponse,
 )
 from repositories.categories import CategoryRepository
@@ -22,26 +34,56 @@ class CategoryService:
         self.repository = repository
 
     async def get_all_categories(self) -> CategoryListResponse:
+        entry = await self.get_all_categories_entry()
+        return entry.response
+
+    async def get_categories_by_type(self, category_type: CategoryType) -> CategoryListResponse:
+        entry = await self.get_categories_by_type_entry(category_type)
+        return entry.response
+
+    async def get_all_categories_entry(self) -> CategoryTreeEntry:
+        """
+        Получить дерево всех категорий вместе с готовым JSON-телом и ETag.
+        """
         logger.info("Service call: get_all_categories")
+        cached = category_tree_cache.get(ALL_CATEGORIES_KEY)
+        if cached is not None:
+            logger.info("Service: category tree served from cache")
+            return cached
+
+        generation = category_tree_cache.generation
         categories = await self.repository.get_all_categories()
         tree = self._build_tree(categories)
-        response = CategoryListResponse(
+        response = CategoryListResponse.model_construct(
             items=tree,
             message="Список категорий успешно получен",
         )
+        entry = await CategoryTreeEntry.build(response)
+        category_tree_cache.set(ALL_CATEGORIES_KEY, entry, generation)
         logger.info("Service: fetched %d root categories", len(tree))
-        return response
+        return entry
 
-    async def get_categories_by_type(self, category_type: CategoryType) -> CategoryListResponse:
+    async def get_categories_by_type_entry(self, category_type: CategoryType) -> CategoryTreeEntry:
+        """
+        Получить дерево категорий указанного типа вместе с готовым JSON-телом и ETag.
+        """
         logger.info("Service call: get_categories_by_type %s", category_type)
+        cached = category_tree_cache.get(category_type)
+        if cached is not None:
+            logger.info("Service: category tree of type %s served from cache", category_type)
+            return cached
+
+        generation = category_tree_cache.generation
         categories = await self.repository.get_categories_by_type(category_type)
         tree = self._build_tree(categories)
-        response = CategoryListResponse(
+        response = CategoryListResponse.model_construct(
             items=tree,
             message=f"Категории типа {category_type.value} успешно получены",
         )
+        entry = await CategoryTreeEntry.build(response)
+        category_tree_cache.set(category_type, entry, generation)
         logger.info("Service: fetched %d root categories for type %s", len(tree), category_type)
-        return response
+        return entry
 
     async def get_category_by_id(self, category_id: int) -> CategoryResponse:
         logger.info("Service call: get_category_by_id %s", category_id)
@@ -64,20 +106,102 @@ class CategoryService:
         logger.info("Service: category %s retrieved", category_id)
         return response
 
+    async def get_category_by_slug(self, slug: str) -> CategoryResponse:
+        """
+        Получить активную категорию по slug.
+        Сначала ищет в индексе slug, построенном вместе с закэшированным деревом,
+        при промахе обращается к индексу slug в БД.
+        """
+        logger.info("Service call: get_category_by_slug '%s'", slug)
+        entry = await self.get_all_categories_entry()
+        cached = entry.slug_index.get(slug)
+        if cached is not None:
+            logger.info("Service: category '%s' served from slug index", slug)
+            return cached
+
+        category = await self.repository.get_category_by_slug(slug)
+        if not category:
+            logger.error("Category with slug '%s' not found", slug)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Категория со slug '{slug}' не найдена",
+            )
+        response = CategoryResponse(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            parent_id=category.parent_id,
+            type=category.type,
+            is_active=category.is_active,
+            message="Категория успешно найдена",
+        )
+        logger.info("Service: category '%s' retrieved from database", slug)
+        return response
+
+    async def get_category_subtree(self, category_id: int, depth: int | None = None) -> CategoryTreeNode:
+        """
+        Получить активную категорию с потомками не глубже depth уровней.
+        """
+        logger.info("Service call: get_category_subtree %s depth=%s", category_id, depth)
+        categories = await self.repository.get_category_subtree(category_id, depth)
+        root = next(
+            (node for node in self._build_tree(categories) if node.id == category_id),
+            None,
+        )
+        if root is None:
+            logger.error("Category %s not found", category_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Категория с id {category_id} не найдена",
+            )
+        root.message = "Поддерево категории успешно получено"
+        logger.info("Service: subtree of category %s built from %d categories", category_id, len(categories))
+        return root
+
+    async def get_category_ancestors(self, category_id: int) -> CategoryAncestorsResponse:
+        """
+        Получить цепочку активных категорий от корня до указанной (хлебные крошки).
+        """
+        logger.info("Service call: get_category_ancestors %s", category_id)
+        categories = await self.repository.get_category_ancestors(category_id)
+        if not categories or categories[-1].id != category_id:
+            logger.error("Category %s not found", category_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Категория с id {category_id} не найдена",
+            )
+        items = [
+            CategoryResponse.model_construct(
+                id=category.id,
+                name=category.name,
+                slug=category.slug,
+                parent_id=category.parent_id,
+                type=category.type,
+                is_active=category.is_active,
+                message=None,
+            )
+            for category in categories
+        ]
+        response = CategoryAncestorsResponse.model_construct(
+            items=items,
+            message="Путь категории успешно получен",
+        )
+        logger.info("Service: path of category %s has %d categories", category_id, len(items))
+        return response
+
     async def create_category(self, request: CategoryCreateRequest) -> CategoryResponse:
         logger.info("Service call: create_category name=%s, slug=%s", request.name, request.slug)
 
-        # Генерируем slug, если он не передан
+        # Генерируем slug из названия, если он не передан
         if request.slug is None or not request.slug.strip():
             logger.info("Generating slug from name '%s'", request.name)
-            slug = await self.repository.generate_unique_slug(request.name)
+            slug_source = request.name
         else:
-            # Проверяем уникальность переданного slug
-            slug = await self.repository.generate_unique_slug(request.slug)
-            if slug != request.slug:
-                logger.warning("Slug '%s' already exists, generated unique slug '%s'", request.slug, slug)
+            slug_source = request.slug
 
         if request.parent_id is not None:
+            # Путь родителя читается под блокировкой: его не переместят до commit
+            await self.repository.lock_category_tree()
             parent = await self.repository.get_category_by_id(request.parent_id)
             if not parent:
                 logger.error("Parent category %s not found", request.parent_id)
@@ -88,11 +212,14 @@ class CategoryService:
 
         category = await self.repository.create_category(
             name=request.name,
-            slug=slug,
+            slug_source=slug_source,
             category_type=request.type,
             parent_id=request.parent_id,
             is_active=request.is_active,
         )
+        if request.slug and category.slug != request.slug:
+            logger.warning("Slug '%s' already exists, generated unique slug '%s'", request.slug, category.slug)
+        category_tree_cache.invalidate()
         response = CategoryResponse(
             id=category.id,
             name=category.name,
@@ -105,6 +232,46 @@ class CategoryService:
         logger.info("Service: category %s created with slug '%s'", category.id, category.slug)
         return response
 
+    async def import_categories(self, request: CategoryBulkImportRequest) -> CategoryBulkImportResponse:
+        """
+        Массовый импорт категорий (например, из ERP).
+        Родители указываются ключом из этой же пачки (parent_key) или id существующей категории.
+        Вся пачка создается в одной транзакции.
+        """
+        logger.info("Service call: import_categories (%d items)", len(request.items))
+        ordered_items = self._order_import_items(request.items)
+
+        parent_ids = {item.parent_id for item in request.items if item.parent_id is not None}
+        if parent_ids:
+            await self.repository.lock_category_tree()
+            parents = await self.repository.get_categories_by_ids(list(parent_ids))
+            missing_ids = parent_ids - {parent.id for parent in parents}
+            if missing_ids:
+                logger.error("Parent categories %s not found", sorted(missing_ids))
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Родительские категории с id {sorted(missing_ids)} не найдены",
+                )
+
+        created = await self.repository.bulk_create_categories(ordered_items)
+        category_tree_cache.invalidate()
+
+        results = {
+            item.key: CategoryImportResult(
+                key=item.key,
+                id=row.id,
+                slug=row.slug,
+                parent_id=row.parent_id,
+            )
+            for item, row in zip(ordered_items, created)
+        }
+        response = CategoryBulkImportResponse(
+            items=[results[item.key] for item in request.items],
+            message=f"Импортировано категорий: {len(results)}",
+        )
+        logger.info("Service: imported %d categories", len(results))
+        return response
+
     async def update_category(
         self,
         category_id: int,
@@ -124,47 +291,38 @@ class CategoryService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Категория с id {category_id} не найдена",
             )
+        if request.parent_id != current_category.parent_id:
+            # Блокировка дерева нужна только при смене родителя; строка перечитывается
+            # под ней, потому что до блокировки её могли переместить
+            await self.repository.lock_category_tree()
+            current_category = await self.repository.reload_category(current_category)
 
         # Определяем, нужно ли перегенерировать slug
         name_changed = current_category.name != request.name
-        
+
         if name_changed:
             # Если изменилось название, перегенерируем slug из нового названия
             logger.info("Category name changed from '%s' to '%s', regenerating slug", current_category.name, request.name)
-            slug = await self.repository.generate_unique_slug(request.name, exclude_id=category_id)
+            slug_source = request.name
         elif request.slug is not None and request.slug.strip():
-            # Если slug передан явно, используем его (проверяем уникальность)
-            slug = await self.repository.generate_unique_slug(request.slug, exclude_id=category_id)
-            if slug != request.slug:
-                logger.warning("Slug '%s' already exists, generated unique slug '%s'", request.slug, slug)
+            # Если slug передан явно, используем его (уникальность проверяется при записи)
+            slug_source = request.slug
         else:
             # Если slug не передан и название не изменилось, оставляем текущий slug
-            slug = current_category.slug
+            slug_source = None
 
         # Проверяем родительскую категорию, если она указана
-        if request.parent_id is not None:
-            if request.parent_id == category_id:
-                logger.error("Category cannot be its own parent")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Категория не может быть родителем самой себя",
-                )
-            parent = await self.repository.get_category_by_id(request.parent_id, include_inactive=True)
-            if not parent:
-                logger.error("Parent category %s not found", request.parent_id)
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Родительская категория с id {request.parent_id} не найдена",
-                )
+        await self._validate_new_parent(category_id, request.parent_id, current_category.parent_id)
 
         category = await self.repository.update_category(
             category_id=category_id,
             name=request.name,
-            slug=slug,
+            slug_source=slug_source,
             category_type=request.type,
             parent_id=request.parent_id,
             is_active=request.is_active if request.is_active is not None else current_category.is_active,
         )
+        category_tree_cache.invalidate()
 
         response = CategoryResponse(
             id=category.id,
@@ -178,43 +336,115 @@ class CategoryService:
         logger.info("Service: category %s updated with slug '%s'", category.id, category.slug)
         return response
 
+    async def move_category(self, category_id: int, request: CategoryMoveRequest) -> CategoryResponse:
+        """
+        Переместить категорию (вместе с поддеревом) под другого родителя или в корень.
+        """
+        logger.info("Service call: move_category id=%s, parent_id=%s", category_id, request.parent_id)
+        # Блокировка до чтения категории: родитель и пути читаются уже после неё
+        await self.repository.lock_category_tree()
+        current_category = await self.repository.get_category_by_id(category_id, include_inactive=True)
+        if not current_category:
+            logger.error("Category %s not found for move", category_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Категория с id {category_id} не найдена",
+            )
+
+        await self._validate_new_parent(category_id, request.parent_id, current_category.parent_id)
+
+        category = await self.repository.move_category(category_id, request.parent_id)
+        category_tree_cache.invalidate()
+        response = CategoryResponse(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            parent_id=category.parent_id,
+            type=category.type,
+            is_active=category.is_active,
+            message="Категория успешно перемещена",
+        )
+        logger.info("Service: category %s moved under %s", category_id, request.parent_id)
+        return response
+
     async def delete_category(self, category_id: int) -> CategoryDeleteResponse:
         logger.info("Service call: delete_category %s", category_id)
-        success = await self.repository.deactivate_category(category_id)
-        if not success:
+        deactivated_ids = await self.repository.deactivate_category(category_id)
+        if not deactivated_ids:
             logger.error("Category %s not found for deletion", category_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Категория с id {category_id} не найдена",
             )
+        category_tree_cache.invalidate()
         response = CategoryDeleteResponse(
             category_id=category_id,
+            deactivated_ids=deactivated_ids,
             message="Категория деактивирована",
         )
-        logger.info("Service: category %s deactivated", category_id)
+        logger.info("Service: category %s deactivated with %d descendants", category_id, len(deactivated_ids) - 1)
         return response
 
-    def _build_tree(self, categories: List) -> List[CategoryTreeNode]:
+    async def _validate_new_parent(
+        self,
+        category_id: int,
+        parent_id: Optional[int],
+        current_parent_id: Optional[int],
+    ) -> None:
+        """
+        Проверяет нового родителя категории: он существует и не лежит в её поддереве.
+        Вызывается под lock_category_tree: цепочка предков читается одним рекурсивным
+        запросом в той же транзакции, что и последующее обновление.
+        """
+        if parent_id is None:
+            return
+        if parent_id == category_id:
+            logger.error("Category cannot be its own parent")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Категория не может быть родителем самой себя",
+            )
+        parent = await self.repository.get_category_by_id(parent_id, include_inactive=True)
+        if not parent:
+            logger.error("Parent category %s not found", parent_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Родительская категория с id {parent_id} не найдена",
+            )
+        if parent_id == current_parent_id:
+            return
+
+        ancestor_ids = await self.repository.get_ancestor_ids(parent_id)
+        if category_id in ancestor_ids:
+            logger.error("Category %s cannot be moved under its descendant %s", category_id, parent_id)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Категорию нельзя переместить внутрь её собственного поддерева",
+            )
+
+    def _build_tree(self, categories: List[Row]) -> List[CategoryTreeNode]:
+        """
+        Собрать дерево из плоских строк (id, name, slug, parent_id, type, is_active).
+        Узлы создаются через model_construct: строки из БД уже соответствуют схеме.
+        """
         logger.debug("Building category tree from %d categories", len(categories))
         nodes: dict[int, CategoryTreeNode] = {}
         roots: List[CategoryTreeNode] = []
 
-        for category in categories:
-            node = CategoryTreeNode(
-                id=category.id,
-                name=category.name,
-                slug=category.slug,
-                parent_id=category.parent_id,
-                type=category.type,
-                is_active=category.is_active,
+        for category_id, name, slug, parent_id, category_type, is_active in categories:
+            nodes[category_id] = CategoryTreeNode.model_construct(
+                id=category_id,
+                name=name,
+                slug=slug,
+                parent_id=parent_id,
+                type=category_type,
+                is_active=is_active,
                 message=None,
                 children=[],
             )
-            nodes[category.id] = node
 
-        for category in categories:
-            node = nodes[category.id]
-            parent_id = category.parent_id
+        for node in nodes.values():
+            parent_id = node.parent_id
             if parent_id and parent_id in nodes:
                 nodes[parent_id].children.append(node)
             else:
@@ -223,3 +453,48 @@ class CategoryService:
         logger.debug("Built tree with %d root categories", len(roots))
         return roots
 
+    def _order_import_items(self, items: List[CategoryImportItem]) -> List[CategoryImportItem]:
+        """
+        Проверяет ссылки parent_key и упорядочивает пачку так, чтобы родители шли раньше детей.
+        """
+        by_key: dict[str, CategoryImportItem] = {}
+        for item in items:
+            if item.key in by_key:
+                self._raise_import_error(f"Ключ '{item.key}' встречается в пачке несколько раз")
+            if item.parent_key is not None and item.parent_id is not None:
+                self._raise_import_error(f"Для '{item.key}' нужно указать либо parent_key, либо parent_id")
+            by_key[item.key] = item
+
+        for item in items:
+            if item.parent_key is not None and item.parent_key not in by_key:
+                self._raise_import_error(f"Родитель '{item.parent_key}' для '{item.key}' отсутствует в пачке")
+
+        # Глубина внутри пачки: корни пачки (без parent_key) имеют глубину 0
+        depths: dict[str, int] = {}
+        for item in items:
+            chain = []
+            seen = set()
+            current = item
+            while current.key not in depths:
+                if current.key in seen:
+                    self._raise_import_error(f"Циклическая ссылка на родителя у '{current.key}'")
+                seen.add(current.key)
+                chain.append(current)
+                if current.parent_key is None:
+                    depth = -1
+                    break
+                current = by_key[current.parent_key]
+            else:
+                depth = depths[current.key]
+            for node in reversed(chain):
+                depth += 1
+                depths[node.key] = depth
+
+        return sorted(items, key=lambda item: depths[item.key])
+
+    def _raise_import_error(self, detail: str) -> None:
+        logger.error("Category import rejected: %s", detail)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+        )
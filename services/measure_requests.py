@@ -1,34 +1,105 @@
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Optional
+import csv
+import io
 import logging
 
 from fastapi import HTTPException, status
 
 from repositories.measure_requests import MeasureRequestRepository
+from core.config import get_settings
 from core.models.measure_requests import MeasureRequestStatus
 from core.schemas.measure_requests import (
     MeasureRequestCreateRequest,
     MeasureRequestUpdateRequest,
     MeasureRequestStatusUpdateRequest,
+    MeasureRequestBulkStatusRequest,
+    MeasureRequestBulkStatusResponse,
+    MeasureRequestExportFormat,
     MeasureRequestResponse,
     MeasureRequestListResponse,
 )
+from core.utils.cursor import decode_cursor, encode_cursor
+from core.utils.responses import dump_json
 
 logger = logging.getLogger(__name__)
 
+EXPORT_FIELDS = (
+    "id",
+    "full_name",
+    "phone",
+    "address",
+    "preferred_date",
+    "comment",
+    "status",
+    "created_at",
+)
+# BOM, чтобы Excel открыл CSV с кириллицей в UTF-8
+CSV_BOM = "\ufeff"
+# С этих символов Excel начинает формулу (CSV injection)
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_safe(value: str | None) -> str:
+    """
+    Текст из публичной формы для ячейки CSV: значение, которое Excel принял бы
+    за формулу (=HYPERLINK(...), =cmd|..., а также +7-999-123-45-67 как арифметику),
+    экранируется апострофом.
+    """
+    if not value:
+        return ""
+    if value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
 
 class MeasureRequestService:
     def __init__(self, repository: MeasureRequestRepository):
         self.repository = repository
 
     async def get_all_measure_requests(
-        self, status_filter: MeasureRequestStatus | None = None
+        self,
+        status_filter: MeasureRequestStatus | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+        with_total: bool = False,
     ) -> MeasureRequestListResponse:
         """
-        Получить список всех замеров с опциональной фильтрацией по статусу.
+        Получить страницу замеров с опциональной фильтрацией по статусу.
+
+        Страницы идут по (created_at, id): cursor из next_cursor предыдущего ответа
+        продолжает список, стоимость страницы не зависит от её номера.
         """
-        logger.info("Fetching all measure requests via service with status filter: %s", status_filter)
-        measure_requests = await self.repository.get_all_measure_requests(status_filter)
+        logger.info("Fetching measure requests page via service with status filter: %s", status_filter)
+        settings = get_settings()
+        page_size = min(limit or settings.MEASURE_REQUESTS_PAGE_SIZE, settings.MEASURE_REQUESTS_MAX_PAGE_SIZE)
+
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                logger.error("Invalid measure requests cursor: %s", cursor)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Некорректный курсор страницы",
+                )
+
+        # Лишняя строка показывает, есть ли следующая страница
+        measure_requests = await self.repository.get_all_measure_requests(status_filter, page_size + 1, after)
+        next_cursor = None
+        if len(measure_requests) > page_size:
+            measure_requests = measure_requests[:page_size]
+            last = measure_requests[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        total_estimate = None
+        if with_total:
+            total_estimate = await self.repository.estimate_measure_requests_count(status_filter)
+
+        # Данные из БД уже соответствуют схеме: собираем ответ без повторной валидации
         items = [
-            MeasureRequestResponse(
+            MeasureRequestResponse.model_construct(
                 id=mr.id,
                 full_name=mr.full_name,
                 phone=mr.phone,
@@ -42,8 +113,10 @@ class MeasureRequestService:
             for mr in measure_requests
         ]
 
-        response = MeasureRequestListResponse(
+        response = MeasureRequestListResponse.model_construct(
             items=items,
+            next_cursor=next_cursor,
+            total_estimate=total_estimate,
             message="Список замеров успешно получен",
         )
         logger.info("Successfully fetched %d measure requests", len(items))
@@ -157,11 +230,7 @@ class MeasureRequestService:
 
         measure_request = await self.repository.update_measure_request(measure_request_id, request)
         if not measure_request:
-            logger.error("Measure request with id %s not found for update", measure_request_id)
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Замер с id {measure_request_id} не найден",
-            )
+            await self._raise_not_updated(measure_request_id, request.status)
 
         response = MeasureRequestResponse(
             id=measure_request.id,
@@ -183,16 +252,12 @@ class MeasureRequestService:
         request: MeasureRequestStatusUpdateRequest,
     ) -> MeasureRequestResponse:
         """
-        Обновить статус замера.
+        Обновить статус замера с проверкой допустимости перехода.
         """
         logger.info("Updating measure request status via service with id %s to %s", measure_request_id, request.status)
         measure_request = await self.repository.update_measure_request_status(measure_request_id, request.status)
         if not measure_request:
-            logger.error("Measure request with id %s not found for status update", measure_request_id)
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Замер с id {measure_request_id} не найден",
-            )
+            await self._raise_not_updated(measure_request_id, request.status)
 
         response = MeasureRequestResponse(
             id=measure_request.id,
@@ -208,3 +273,110 @@ class MeasureRequestService:
         logger.info("Measure request status with id %s successfully updated via service", measure_request_id)
         return response
 
+    async def bulk_update_status(
+        self,
+        request: MeasureRequestBulkStatusRequest,
+    ) -> MeasureRequestBulkStatusResponse:
+        """
+        Перевести несколько замеров в статус; для каждого id сообщается результат.
+        """
+        logger.info("Bulk status update via service: %d ids to %s", len(request.ids), request.status)
+        ids = list(dict.fromkeys(request.ids))
+        rows = await self.repository.bulk_update_status(ids, request.status)
+
+        found = {measure_request_id: is_updated for measure_request_id, is_updated in rows}
+        updated = [measure_request_id for measure_request_id in ids if found.get(measure_request_id) is True]
+        skipped = [measure_request_id for measure_request_id in ids if found.get(measure_request_id) is False]
+        missing = [measure_request_id for measure_request_id in ids if measure_request_id not in found]
+
+        response = MeasureRequestBulkStatusResponse(
+            status=request.status,
+            updated=updated,
+            skipped=skipped,
+            missing=missing,
+            message="Статусы замеров обновлены",
+        )
+        logger.info(
+            "Bulk status update via service: %d updated, %d skipped, %d missing",
+            len(updated), len(skipped), len(missing),
+        )
+        return response
+
+    def validate_export_period(self, date_from: Optional[date], date_to: Optional[date]) -> None:
+        """
+        Проверить период выгрузки до начала потока: после отправки заголовков ответа
+        ошибку уже не вернуть.
+        """
+        if date_from is not None and date_to is not None and date_from > date_to:
+            logger.error("Invalid export period: %s > %s", date_from, date_to)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Дата начала периода не может быть позже даты окончания",
+            )
+
+    async def export_measure_requests(
+        self,
+        export_format: MeasureRequestExportFormat,
+        status_filter: MeasureRequestStatus | None = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Выгрузка замеров в CSV или NDJSON по кускам: одна пачка строк из серверного
+        курсора — один кусок ответа. Потребление памяти не зависит от объема выгрузки.
+
+        Период включает обе даты.
+        """
+        logger.info(
+            "Exporting measure requests via service: format=%s, status=%s, from=%s, to=%s",
+            export_format, status_filter, date_from, date_to,
+        )
+        created_from = datetime.combine(date_from, time.min) if date_from is not None else None
+        created_to = datetime.combine(date_to + timedelta(days=1), time.min) if date_to is not None else None
+        partitions = self.repository.stream_measure_requests(status_filter, created_from, created_to)
+
+        if export_format == MeasureRequestExportFormat.CSV:
+            yield (CSV_BOM + ",".join(EXPORT_FIELDS) + "\r\n").encode("utf-8")
+            async for rows in partitions:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in rows:
+                    writer.writerow([
+                        row.id,
+                        csv_safe(row.full_name),
+                        csv_safe(row.phone),
+                        csv_safe(row.address),
+                        row.preferred_date.isoformat() if row.preferred_date else "",
+                        csv_safe(row.comment),
+                        row.status.value,
+                        row.created_at.isoformat(),
+                    ])
+                yield buffer.getvalue().encode("utf-8")
+        else:
+            async for rows in partitions:
+                yield b"".join(dump_json(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+    async def _raise_not_updated(
+        self,
+        measure_request_id: int,
+        target_status: MeasureRequestStatus | None,
+    ) -> None:
+        """
+        UPDATE не затронул строк: выясняем причину только в этом (редком) случае —
+        замера нет (404) или переход статуса запрещен (409).
+        """
+        current = await self.repository.get_measure_request_by_id(measure_request_id)
+        if current is None or target_status is None:
+            logger.error("Measure request with id %s not found for update", measure_request_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Замер с id {measure_request_id} не найден",
+            )
+        logger.error(
+            "Measure request %s: transition %s -> %s is not allowed",
+            measure_request_id, current.status, target_status,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Нельзя изменить статус замера с {current.status.value} на {target_status.value}",
+        )
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    any_,
+    insert,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from core.metrics.statements import normalize_sql
+
+dialect = asyncpg.dialect()
+
+items = Table(
+    "items",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("slug", String(collation="C")),
+    Column("title", String(255)),
+    Column("price", Numeric(10, 2)),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime),
+)
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True}))
+
+
+def rows(count: int) -> list[dict]:
+    return [
+        {
+            "id": index,
+            "slug": f"item-{index}",
+            "title": "Item",
+            "price": 1,
+            "is_active": True,
+            "created_at": datetime(2026, 1, 1),
+        }
+        for index in range(count)
+    ]
+
+
+def test_in_list_with_casts_collapses():
+    short = compile_sql(select(items.c.id).where(items.c.id.in_([1, 2])))
+    long = compile_sql(select(items.c.id).where(items.c.id.in_(list(range(50)))))
+
+    assert "$2::INTEGER" in short
+    assert normalize_sql(short) == normalize_sql(long)
+    assert normalize_sql(short).endswith("IN (?)")
+
+
+def test_multirow_values_with_casts_collapses():
+    one = compile_sql(insert(items).values(rows(1)))
+    many = compile_sql(insert(items).values(rows(20)))
+
+    assert 'COLLATE "C"' in many and "TIMESTAMP WITHOUT TIME ZONE" in many and "NUMERIC(10, 2)" in many
+    assert normalize_sql(one) == normalize_sql(many)
+    assert normalize_sql(many).endswith("VALUES (?)")
+
+
+def test_any_array_keeps_shape():
+    statement = compile_sql(select(items).where(items.c.id == any_(literal([1, 2, 3], ARRAY(Integer)))))
+
+    assert normalize_sql(statement).endswith("= ANY (?)")
+
+
+def test_different_statements_stay_distinct():
+    by_id = compile_sql(select(items.c.id).where(items.c.id.in_([1, 2])))
+    by_slug = compile_sql(select(items.c.id).where(items.c.slug.in_(["a", "b"])))
+
+    assert normalize_sql(by_id) != normalize_sql(by_slug)